@@ -0,0 +1,84 @@
+"""Anonymization cost (ms/frame) against the number of faces, per method.
+
+    python benchmarks/bench_anonymize.py --counts 1,5,20,50 --blur 75
+
+Runs on synthetic frames (no model needed). ``legacy`` is the original
+per-box GaussianBlur loop for reference.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faceshield.anonymize import METHODS, Anonymizer  # noqa: E402
+
+
+def legacy_blur(frame, xyxy, k):
+    h, w = frame.shape[:2]
+    for (x1, y1, x2, y2) in xyxy:
+        x1 = max(0, min(x1, w - 1))
+        x2 = max(0, min(x2, w - 1))
+        y1 = max(0, min(y1, h - 1))
+        y2 = max(0, min(y2, h - 1))
+        if x2 <= x1 or y2 <= y1:
+            continue
+        roi = frame[y1:y2, x1:x2]
+        frame[y1:y2, x1:x2] = cv2.GaussianBlur(roi, (k, k), 0)
+    return frame
+
+
+def random_faces(rng, n, w, h, min_size, max_size):
+    size = rng.integers(min_size, max_size + 1, size=n)
+    x1 = rng.integers(0, w - size)
+    y1 = rng.integers(0, h - size)
+    return np.stack([x1, y1, x1 + size, y1 + (size * 1.25).astype(int)], axis=1)
+
+
+def time_ms(fn, frame, boxes, repeat):
+    work = frame.copy()
+    fn(work, boxes)  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        np.copyto(work, frame)
+        fn(work, boxes)
+    return (time.perf_counter() - t0) * 1000.0 / repeat
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--width", type=int, default=1920)
+    ap.add_argument("--height", type=int, default=1080)
+    ap.add_argument("--counts", default="1,5,20,50")
+    ap.add_argument("--min-size", type=int, default=40)
+    ap.add_argument("--max-size", type=int, default=240)
+    ap.add_argument("--blur", type=int, default=75)
+    ap.add_argument("--shape", default="rect", choices=["rect", "ellipse"])
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, size=(args.height, args.width, 3), dtype=np.uint8)
+    k = args.blur if args.blur % 2 == 1 else args.blur + 1
+
+    runners = {"legacy": lambda f, b: legacy_blur(f, b, k)}
+    for m in METHODS:
+        runners[m] = Anonymizer(m, args.blur, args.shape).apply
+
+    counts = [int(x) for x in args.counts.split(",")]
+    print(f"{args.width}x{args.height}, faces {args.min_size}-{args.max_size}px, "
+          f"blur={k}, shape={args.shape}  (ms/frame)")
+    print(f"{'method':>9}" + "".join(f"{c:>9}" for c in counts))
+    boxes = {c: random_faces(rng, c, args.width, args.height, args.min_size, args.max_size) for c in counts}
+    for name, fn in runners.items():
+        row = [time_ms(fn, frame, boxes[c], args.repeat) for c in counts]
+        print(f"{name:>9}" + "".join(f"{v:>9.2f}" for v in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Detector throughput for different batch sizes.
+
+    python benchmarks/bench_batch.py --model yolov8l_100e.pt --frames 240
+
+Decodes the first ``--frames`` frames of the sample clip once, then times
+``Engine.detect`` over them for every batch size (after one warm-up batch).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faceshield import Engine, Settings  # noqa: E402
+from faceshield.engine import read_batches  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_frames(path, limit):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open input video: {path}")
+    frames = []
+    for batch in read_batches(cap, 1):
+        frames.extend(batch)
+        if len(frames) >= limit:
+            break
+    cap.release()
+    return frames
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--video", default=os.path.join(ROOT, "people_ 2.mp4"))
+    ap.add_argument("--model", default=Settings().model)
+    ap.add_argument("--imgsz", type=int, default=Settings().imgsz)
+    ap.add_argument("--frames", type=int, default=240)
+    ap.add_argument("--sizes", default="1,4,8,16")
+    args = ap.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    if not frames:
+        raise SystemExit("No frames decoded.")
+
+    engine = Engine(Settings(model=args.model, imgsz=args.imgsz))
+    print(f"{len(frames)} frames, {frames[0].shape[1]}x{frames[0].shape[0]}, "
+          f"imgsz={args.imgsz}, device={engine.device}")
+    print(f"{'batch':>5}  {'fps':>8}  {'ms/frame':>9}  {'speed-up':>8}")
+
+    base = None
+    for size in [int(x) for x in args.sizes.split(",")]:
+        engine.settings.batch = size
+        engine.detect(frames[:size])  # warm-up
+
+        t0 = time.perf_counter()
+        for i in range(0, len(frames), size):
+            engine.detect(frames[i:i + size])
+        dt = time.perf_counter() - t0
+
+        fps = len(frames) / dt
+        base = base or fps
+        print(f"{size:>5}  {fps:>8.2f}  {1000.0 / fps:>9.2f}  {fps / base:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""End-to-end throughput suite with JSON baselines and regression checks.
+
+    python benchmarks/bench_suite.py --save benchmarks/baselines/my-pc.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baselines/my-pc.json
+
+Runs ``Engine.process_video`` on CPU only, fully offline (the model file must
+exist locally), over short clips cut from the sample video:
+
+- ``clip``  - the first ``--frames`` frames as they are
+- ``crowd`` - every frame is a 3x3 mosaic of clip frames: nine times the
+  faces, each a third of the size (a face-count-heavy, small-face load)
+
+For each scene a base case (``--base``) is run and then one setting at a time
+is varied over ``--imgsz``, ``--blur`` and ``--codecs`` (``--full`` runs the
+whole cross product instead). Every case reports frames/sec, ms/frame per
+stage (from the built-in profiler), the sampled peak RSS, how much RSS still
+grew in the second half of the run (should stay near 0: frame buffers are
+recycled), the frame pool size and the output size.
+With ``--baseline`` results are compared against a saved run and any
+regression beyond ``--threshold`` makes the script exit with status 1.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+# CPU only, no update checks / downloads: must be set before torch and ultralytics load
+os.environ["CUDA_VISIBLE_DEVICES"] = ""
+os.environ.setdefault("YOLO_OFFLINE", "true")
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faceshield import Engine, Settings  # noqa: E402
+from faceshield.encoders import open_cv_writer  # noqa: E402
+from faceshield.engine import probe_video, read_batches  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENES = ("clip", "crowd")
+# Stages compared against the baseline (ms/frame); tiny stages are too noisy
+STAGES = ("decode", "infer", "blur", "encode")
+MIN_STAGE_MS = 1.0
+
+
+def make_scene(src, dst, scene, frames):
+    """Write ``frames`` frames of ``scene`` built from ``src`` to ``dst``."""
+    fps, w, h, _ = probe_video(src)
+    cap = cv2.VideoCapture(src)
+    clip = []
+    for batch in read_batches(cap, 1, frames if scene == "clip" else frames + 8):
+        clip.extend(batch)
+    cap.release()
+    if not clip:
+        raise SystemExit(f"No frames decoded from {src}")
+
+    writer = open_cv_writer(dst, fps, w, h)
+    try:
+        for i in range(frames):
+            if scene == "clip":
+                writer.write(clip[i % len(clip)])
+                continue
+            tw, th = w // 3, h // 3
+            canvas = np.zeros((h, w, 3), dtype=np.uint8)
+            for k in range(9):
+                tile = cv2.resize(clip[(i + k) % len(clip)], (tw, th), interpolation=cv2.INTER_AREA)
+                y, x = (k // 3) * th, (k % 3) * tw
+                canvas[y:y + th, x:x + tw] = tile
+            writer.write(canvas)
+    finally:
+        writer.release()
+
+
+def parse_codec(name):
+    """``opencv`` or an ffmpeg codec name -> ``(encoder, codec)``."""
+    return ("opencv", Settings().codec) if name == "opencv" else ("ffmpeg", name)
+
+
+def build_cases(args):
+    imgszs = [int(x) for x in args.imgsz.split(",")]
+    blurs = [int(x) for x in args.blur.split(",")]
+    codecs = args.codecs.split(",")
+    base_imgsz, base_blur, base_codec = args.base.split(",")
+    base = (int(base_imgsz), int(base_blur), base_codec)
+
+    if args.full:
+        combos = list(itertools.product(imgszs, blurs, codecs))
+    else:
+        combos = [base]
+        combos += [(v, base[1], base[2]) for v in imgszs]
+        combos += [(base[0], v, base[2]) for v in blurs]
+        combos += [(base[0], base[1], v) for v in codecs]
+
+    cases = []
+    for scene in args.scenes.split(","):
+        for combo in dict.fromkeys(combos):
+            cases.append((scene,) + combo)
+    return cases
+
+
+def case_key(scene, imgsz, blur, codec):
+    return f"{scene}/imgsz{imgsz}/blur{blur}/{codec}"
+
+
+def run_case(engine, src, dst, imgsz, blur, codec):
+    encoder, ffcodec = parse_codec(codec)
+    engine.settings.imgsz = imgsz
+    engine.settings.blur = blur
+    engine.settings.encoder = encoder
+    engine.settings.codec = ffcodec
+
+    t0 = time.perf_counter()
+    engine.process_video(src, dst)
+    wall = time.perf_counter() - t0
+
+    stats = engine.last_profile.stats()
+    frames = stats.get("encode", {}).get("frames", 0)
+    return {
+        "frames": frames,
+        "fps": frames / wall if wall > 0 else 0.0,
+        "ms": {s: round(stats[s]["ms_per_frame"], 3) for s in STAGES if s in stats},
+        "peak_rss_mb": round(max(engine.last_profile.mem_high.values(), default=0) / 2**20, 1),
+        "rss_growth_mb": round(engine.last_profile.rss_growth() / 2**20, 1),
+        "frame_pool_mb": engine.last_profile.counters.get("frame_pool_mb", 0.0),
+        "output_bytes": os.path.getsize(dst),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Regression messages for ``results`` against ``baseline`` (both keyed by case)."""
+    issues = []
+    for key, cur in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if cur["fps"] < old["fps"] * (1 - threshold):
+            issues.append(f"{key}: fps {old['fps']:.2f} -> {cur['fps']:.2f}")
+        for stage, ms in cur["ms"].items():
+            prev = old.get("ms", {}).get(stage)
+            if prev is not None and max(ms, prev) >= MIN_STAGE_MS and ms > prev * (1 + threshold):
+                issues.append(f"{key}: {stage} {prev:.2f} -> {ms:.2f} ms/frame")
+        if cur["peak_rss_mb"] > old["peak_rss_mb"] * (1 + threshold):
+            issues.append(f"{key}: peak RSS {old['peak_rss_mb']:.0f} -> {cur['peak_rss_mb']:.0f} MB")
+        if cur.get("rss_growth_mb", 0) > old.get("rss_growth_mb", 0) + threshold * old["peak_rss_mb"]:
+            issues.append(f"{key}: RSS grew {cur['rss_growth_mb']:.0f} MB during the run")
+        if abs(cur["output_bytes"] - old["output_bytes"]) > old["output_bytes"] * threshold:
+            issues.append(f"{key}: output size {old['output_bytes']} -> {cur['output_bytes']} bytes")
+    return issues
+
+
+def environment():
+    versions = {"python": platform.python_version(), "opencv": cv2.__version__, "numpy": np.__version__}
+    for name in ("torch", "ultralytics"):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            pass
+    return {"machine": platform.machine(), "processor": platform.processor(), "cpus": os.cpu_count(), **versions}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--video", default=os.path.join(ROOT, "people_ 2.mp4"))
+    ap.add_argument("--model", default=Settings().model)
+    ap.add_argument("--frames", type=int, default=90, help="Frames per case.")
+    ap.add_argument("--scenes", default=",".join(SCENES))
+    ap.add_argument("--imgsz", default="640,960,1280")
+    ap.add_argument("--blur", default="31,75,121")
+    ap.add_argument("--codecs", default="opencv,libx264",
+                    help="opencv and/or ffmpeg codecs (libx264, libx265).")
+    ap.add_argument("--base", default="640,75,opencv", help="imgsz,blur,codec of the base case.")
+    ap.add_argument("--full", action="store_true", help="Run the full cross product.")
+    ap.add_argument("--batch", type=int, default=Settings().batch)
+    ap.add_argument("--save", default="", help="Write the results as a JSON baseline.")
+    ap.add_argument("--baseline", default="", help="Compare against this JSON baseline.")
+    ap.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression.")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.model):
+        raise SystemExit(f"Model not found: {args.model} (the suite never downloads weights)")
+
+    cases = build_cases(args)
+    if shutil.which("ffmpeg") is None:
+        skipped = [c for c in cases if parse_codec(c[3])[0] == "ffmpeg"]
+        if skipped:
+            print(f"ffmpeg not found: skipping {len(skipped)} ffmpeg case(s)")
+        cases = [c for c in cases if c not in skipped]
+
+    base_imgsz = int(args.base.split(",")[0])
+    engine = Engine(Settings(
+        model=args.model, imgsz=base_imgsz, batch=args.batch, half=False, cache=False, profile=True
+    ))
+
+    tmp = tempfile.mkdtemp(prefix="faceshield_bench_")
+    results = {}
+    try:
+        inputs = {}
+        for scene in dict.fromkeys(c[0] for c in cases):
+            inputs[scene] = os.path.join(tmp, f"{scene}.mp4")
+            make_scene(args.video, inputs[scene], scene, args.frames)
+
+        # Warm-up: first inference allocates and picks kernels
+        engine.detect([cv2.imread(os.path.join(ROOT, "cover.jpg"))])
+
+        print(f"{len(cases)} cases x {args.frames} frames, device={engine.device}")
+        print(f"{'case':<36}{'fps':>8}{'decode':>8}{'infer':>8}{'blur':>8}{'encode':>8}{'RSS MB':>8}{'growth':>8}{'pool MB':>8}{'out KB':>9}")
+        for scene, imgsz, blur, codec in cases:
+            key = case_key(scene, imgsz, blur, codec)
+            r = run_case(engine, inputs[scene], os.path.join(tmp, "out.mp4"), imgsz, blur, codec)
+            results[key] = r
+            ms = [r["ms"].get(s, 0.0) for s in STAGES]
+            print(f"{key:<36}{r['fps']:>8.2f}" + "".join(f"{m:>8.1f}" for m in ms)
+                  + f"{r['peak_rss_mb']:>8.0f}{r['rss_growth_mb']:>8.1f}{r['frame_pool_mb']:>8.0f}"
+                  + f"{r['output_bytes'] / 1024:>9.0f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "frames": args.frames,
+        "model": os.path.basename(args.model),
+        "env": environment(),
+        "results": results,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved baseline: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        if base.get("frames") != args.frames:
+            print(f"note: baseline used {base.get('frames')} frames per case, this run {args.frames}")
+        issues = compare(results, base.get("results", {}), args.threshold)
+        if issues:
+            print(f"\n{len(issues)} regression(s) beyond {args.threshold:.0%}:")
+            for line in issues:
+                print(f"  {line}")
+            return 1
+        print(f"\nno regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
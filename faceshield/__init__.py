@@ -0,0 +1,16 @@
+"""Face Shield AI processing core (GUI-free).
+
+The Tk application in ``main.py`` and the headless CLI (``python -m faceshield``)
+both drive the same :class:`Engine`.
+"""
+
+__all__ = ["Engine", "Settings", "VIDEO_EXTS"]
+
+
+def __getattr__(name):
+    # Resolved on first use so tools that only need e.g. faceshield.anonymize
+    # do not pull in torch / ultralytics.
+    if name in __all__:
+        from . import engine
+        return getattr(engine, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,172 @@
+import math
+from collections import deque
+
+import numpy as np
+
+
+# Inference sizes the controller may switch between (capped by settings.imgsz)
+IMGSZ_STEPS = (1280, 960, 640)
+
+
+def _smallest_face(boxes):
+    if boxes is None or len(boxes) == 0:
+        return None
+    b = np.asarray(boxes, dtype=np.float32)
+    return float(np.minimum(b[:, 2] - b[:, 0], b[:, 3] - b[:, 1]).min())
+
+
+class SpeedController:
+    """Chooses inference size and detection interval to reach a target speed.
+
+    Levels are ``(imgsz, interval)`` pairs ordered by estimated cost
+    (``imgsz**2 / interval``). After every batch the measured detection cost
+    per frame is compared with the time one frame may take at ``target_fps``.
+    When too slow, or comfortably fast (below ``relax`` of that time), the
+    controller moves to the most expensive level whose predicted cost fits
+    within ``relax`` of the budget. A change waits ``cooldown`` frames so the
+    new level gets measured before the next decision.
+
+    Small faces set a safety floor: with the smallest face seen in the last
+    ``window`` keyframes, no size is used at which that face would shrink
+    below ``min_face_px`` inference pixels. Every ``probe_every`` frames a
+    keyframe runs at full size anyway, so small faces that a reduced size
+    misses still raise the floor. Every change is kept in ``log``.
+
+    With a deadline (:meth:`set_deadline`) the target follows the remaining
+    frames and time; once the deadline has passed the controller stays at the
+    fastest level the small-face floor allows.
+    """
+
+    def __init__(self, target_fps, imgsz_max, frame_w, frame_h, max_interval=4,
+                 min_face_px=16, window=30, probe_every=50, cooldown=30, relax=0.6):
+        self.target_fps = float(target_fps)
+        self.imgsz_max = int(imgsz_max)
+        self.long_side = max(int(frame_w), int(frame_h))
+        self.min_face_px = float(min_face_px)
+        self.probe_every = int(probe_every)
+        self.cooldown = int(cooldown)
+        self.relax = float(relax)
+
+        sizes = sorted({s for s in IMGSZ_STEPS if s < self.imgsz_max} | {self.imgsz_max}, reverse=True)
+        levels = [(sz, iv) for sz in sizes for iv in range(1, max(1, int(max_interval)) + 1)]
+        self.levels = sorted(levels, key=lambda lv: (-(lv[0] ** 2) / lv[1], lv[1]))
+        self.level = 0
+
+        self.cost = None  # detection seconds per frame at the current level (EMA)
+        self.faces = deque(maxlen=int(window))  # smallest face side per keyframe, px
+        self.probe_faces = deque(maxlen=2)  # same for the last full-size probes
+        self.frame = 0
+        self.changed_at = 0
+        self.since_probe = 0
+        self.probes = 0
+        self.frames_at = {}
+        self.log = []
+        self.deadline_fps = None  # target when the deadline was first set
+        self.missed = False
+
+    @property
+    def imgsz(self):
+        return self.levels[self.level][0]
+
+    @property
+    def interval(self):
+        return self.levels[self.level][1]
+
+    def set_deadline(self, frames_left, seconds_left):
+        """Derive the target from a deadline: remaining frames over remaining time."""
+        if seconds_left <= 0:
+            self.missed = True
+            return
+        self.target_fps = frames_left / seconds_left
+        if self.deadline_fps is None:
+            self.deadline_fps = self.target_fps
+
+    def floor(self) -> int:
+        """Smallest inference size that keeps the smallest recent face detectable."""
+        seen = [f for f in list(self.faces) + list(self.probe_faces) if f is not None]
+        if not seen:
+            return 0
+        need = self.min_face_px * self.long_side / max(1.0, min(seen))
+        return int(32 * math.ceil(need / 32))
+
+    def probe_due(self) -> bool:
+        """True when the next keyframe should run at full size (small-face check)."""
+        return self.imgsz < self.imgsz_max and self.since_probe >= self.probe_every
+
+    def observe(self, n_frames, busy_s, keyframe_boxes, probe=None):
+        """Feed one batch: frame count, detection time and boxes of its keyframes.
+
+        ``probe`` is ``[boxes]`` when the batch included a full-size probe.
+        """
+        self.frame += n_frames
+        key = self.levels[self.level]
+        self.frames_at[key] = self.frames_at.get(key, 0) + n_frames
+        for boxes in keyframe_boxes:
+            self.faces.append(_smallest_face(boxes))
+        if probe is not None:
+            self.probes += 1
+            self.since_probe = 0
+            self.probe_faces.append(_smallest_face(probe[0]))
+        else:
+            self.since_probe += n_frames
+
+        per_frame = busy_s / max(1, n_frames)
+        self.cost = per_frame if self.cost is None else self.cost + 0.3 * (per_frame - self.cost)
+
+        floor = self.floor()
+        if self.imgsz < floor:
+            # Safety first: never wait for the cooldown to restore small-face recall
+            allowed = [i for i, lv in enumerate(self.levels) if lv[0] >= floor] or [0]
+            self._switch(max(allowed), f"small faces need imgsz >= {floor}")
+            return
+        if self.missed:
+            allowed = [i for i, lv in enumerate(self.levels) if lv[0] >= floor] or [0]
+            self._switch(max(allowed), "deadline missed")
+            return
+        if self.frame - self.changed_at < self.cooldown or self.target_fps <= 0:
+            return
+
+        # Costs scale roughly with imgsz**2 / interval: predict every level from this one
+        budget = 1.0 / self.target_fps
+        unit = self.cost / self._rel(self.levels[self.level])
+        allowed = [i for i, lv in enumerate(self.levels) if lv[0] >= floor] or [0]
+        fitting = [i for i in allowed if unit * self._rel(self.levels[i]) <= budget * self.relax]
+        best = fitting[0] if fitting else allowed[-1]
+        if self.cost > budget and best > self.level:
+            self._switch(best, f"{1.0 / self.cost:.1f} fps < target {self.target_fps:.1f}")
+        elif self.cost < budget * self.relax and best < self.level:
+            self._switch(best, f"{1.0 / self.cost:.1f} fps, headroom over {self.target_fps:.1f}")
+
+    def _rel(self, level):
+        sz, iv = level
+        return (sz / self.imgsz_max) ** 2 / iv
+
+    def _switch(self, level, reason):
+        if level == self.level:
+            return
+        old = self.levels[self.level]
+        self.level = level
+        self.changed_at = self.frame
+        self.cost = None
+        new = self.levels[level]
+        self.log.append(
+            f"frame {self.frame}: imgsz {old[0]}->{new[0]}, interval {old[1]}->{new[1]} ({reason})"
+        )
+
+    def summary(self) -> str:
+        total = max(1, sum(self.frames_at.values()))
+        shares = ", ".join(
+            f"{sz}/every {iv}: {100.0 * n / total:.0f}%"
+            for (sz, iv), n in sorted(self.frames_at.items(), key=lambda kv: -kv[1])
+        )
+        floor = self.floor()
+        if self.missed:
+            target = "deadline missed"
+        elif self.deadline_fps is not None:
+            target = f"deadline target {self.deadline_fps:.1f} fps"
+        else:
+            target = f"target {self.target_fps:.1f} fps"
+        text = f"adaptive: {target}; {shares}; {len(self.log)} change(s), {self.probes} probe(s)"
+        if floor:
+            text += f"; small-face floor imgsz {floor}"
+        return text
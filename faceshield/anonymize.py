@@ -0,0 +1,175 @@
+import math
+
+import cv2
+import numpy as np
+
+
+METHODS = ("gaussian", "fast", "box", "pixelate", "fill")
+SHAPES = ("rect", "ellipse")
+
+# Working kernel size for the "fast" method after downscaling
+FAST_KERNEL = 15
+
+
+def clip_boxes(xyxy, w, h):
+    """Clip an ``(N, 4)`` xyxy array to the frame and drop empty boxes."""
+    if xyxy is None or len(xyxy) == 0:
+        return np.zeros((0, 4), dtype=np.int64)
+    b = np.asarray(xyxy).astype(np.int64, copy=True).reshape(-1, 4)
+    np.clip(b[:, 0::2], 0, w - 1, out=b[:, 0::2])
+    np.clip(b[:, 1::2], 0, h - 1, out=b[:, 1::2])
+    keep = (b[:, 2] > b[:, 0]) & (b[:, 3] > b[:, 1])
+    return b[keep]
+
+
+def merge_boxes(boxes):
+    """Group overlapping boxes.
+
+    Returns ``[(region, members), ...]`` where ``region`` is the bounding xyxy
+    of a group of mutually overlapping boxes and ``members`` their row indices.
+    """
+    n = len(boxes)
+    if n == 0:
+        return []
+    if n == 1:
+        return [(boxes[0], [0])]
+
+    overlap = (
+        (boxes[:, None, 0] < boxes[None, :, 2]) & (boxes[None, :, 0] < boxes[:, None, 2]) &
+        (boxes[:, None, 1] < boxes[None, :, 3]) & (boxes[None, :, 1] < boxes[:, None, 3])
+    )
+
+    groups = []
+    seen = np.zeros(n, dtype=bool)
+    for i in range(n):
+        if seen[i]:
+            continue
+        stack = [i]
+        seen[i] = True
+        members = []
+        while stack:
+            j = stack.pop()
+            members.append(j)
+            for k in np.flatnonzero(overlap[j] & ~seen):
+                seen[k] = True
+                stack.append(int(k))
+        g = boxes[members]
+        region = np.array([g[:, 0].min(), g[:, 1].min(), g[:, 2].max(), g[:, 3].max()])
+        groups.append((region, sorted(members)))
+    return groups
+
+
+def odd(k):
+    k = max(1, int(k))
+    return k if k % 2 == 1 else k + 1
+
+
+def gaussian_sigma(k):
+    # Same sigma OpenCV derives for GaussianBlur(..., sigmaX=0)
+    return 0.3 * ((k - 1) * 0.5 - 1) + 0.8
+
+
+class Anonymizer:
+    """Anonymizes all face boxes of a frame in one call.
+
+    Overlapping boxes are merged into one region so every pixel is processed
+    once. ``method`` picks how a region is hidden:
+
+    - ``gaussian``: full ``cv2.GaussianBlur`` with a ``strength`` x ``strength`` kernel
+    - ``fast``: downscale -> small Gaussian -> upscale (same visual blur, far cheaper)
+    - ``box``: three separable box blurs approximating the Gaussian (O(1) per pixel)
+    - ``pixelate``: mosaic with blocks of about ``strength / 8`` pixels
+    - ``fill``: solid ``color``
+
+    ``shape="ellipse"`` limits the effect to the ellipse inscribed in each box.
+
+    Results are written straight into the frame; merged regions go through
+    scratch buffers kept on the instance, so a frame costs no allocations once
+    the largest region has been seen. An instance must not be shared between
+    threads.
+    """
+
+    def __init__(self, method="gaussian", strength=75, shape="rect", color=(0, 0, 0)):
+        if method not in METHODS:
+            raise ValueError(f"Unknown anonymization method: {method}")
+        if shape not in SHAPES:
+            raise ValueError(f"Unknown mask shape: {shape}")
+        self.method = method
+        self.shape = shape
+        self.color = tuple(int(c) for c in color)
+        self.k = odd(strength)
+        self._scratch = {}
+
+    def apply(self, frame, xyxy):
+        """Anonymize ``xyxy`` boxes in ``frame`` in place and return it."""
+        h, w = frame.shape[:2]
+        boxes = clip_boxes(xyxy, w, h)
+        for region, members in merge_boxes(boxes):
+            x1, y1, x2, y2 = (int(v) for v in region)
+            roi = frame[y1:y2, x1:x2]
+
+            if len(members) == 1 and self.shape == "rect":
+                self._hide(roi, roi)
+                continue
+
+            mask = self.scratch("mask", roi.shape[:2])
+            mask[...] = 0
+            for bx1, by1, bx2, by2 in boxes[members] - (x1, y1, x1, y1):
+                if self.shape == "ellipse":
+                    center = ((bx1 + bx2) // 2, (by1 + by2) // 2)
+                    axes = (max(1, (bx2 - bx1) // 2), max(1, (by2 - by1) // 2))
+                    cv2.ellipse(mask, center, axes, 0, 0, 360, 255, -1)
+                else:
+                    mask[by1:by2, bx1:bx2] = 255
+            cv2.copyTo(self._hide(roi, self.scratch("roi", roi.shape, roi.dtype)), mask, roi)
+        return frame
+
+    def scratch(self, name, shape, dtype=np.uint8):
+        """Reusable ``dtype`` buffer ``name`` viewed as ``shape`` (grown when too small)."""
+        size = int(np.prod(shape))
+        key = (name, np.dtype(dtype))
+        buf = self._scratch.get(key)
+        if buf is None or buf.size < size:
+            buf = self._scratch[key] = np.empty(size, dtype=dtype)
+        return buf[:size].reshape(shape)
+
+    def _hide(self, roi, out):
+        # Writes the hidden version of ``roi`` into ``out`` (which may be ``roi``)
+        if self.method == "fill":
+            out[...] = self.color[:roi.shape[2]] if roi.ndim == 3 else self.color[0]
+            return out
+        if self.method == "gaussian":
+            return cv2.GaussianBlur(roi, (self.k, self.k), 0, dst=out)
+        if self.method == "fast":
+            return self._fast(roi, out)
+        if self.method == "box":
+            return self._box(roi, out)
+        return self._pixelate(roi, out)
+
+    def _fast(self, roi, out):
+        rh, rw = roi.shape[:2]
+        # Keep at least a few pixels per side so the result does not go blocky
+        f = max(1, min(self.k // FAST_KERNEL, min(rh, rw) // 4))
+        if f == 1:
+            return cv2.GaussianBlur(roi, (self.k, self.k), 0, dst=out)
+        sw, sh = max(1, rw // f), max(1, rh // f)
+        small = self.scratch("small", (sh, sw) + roi.shape[2:], roi.dtype)
+        cv2.resize(roi, (sw, sh), dst=small, interpolation=cv2.INTER_AREA)
+        cv2.GaussianBlur(small, (odd(self.k / f), odd(self.k / f)), 0, dst=small)
+        return cv2.resize(small, (rw, rh), dst=out, interpolation=cv2.INTER_LINEAR)
+
+    def _box(self, roi, out):
+        sigma = gaussian_sigma(self.k)
+        # Three box passes of width b have variance 3 * (b^2 - 1) / 12
+        b = max(1, int(round(math.sqrt(4 * sigma * sigma + 1))))
+        cv2.blur(roi, (b, b), dst=out)
+        cv2.blur(out, (b, b), dst=out)
+        return cv2.blur(out, (b, b), dst=out)
+
+    def _pixelate(self, roi, out):
+        rh, rw = roi.shape[:2]
+        block = max(2, self.k // 8)
+        sw, sh = max(1, rw // block), max(1, rh // block)
+        small = self.scratch("small", (sh, sw) + roi.shape[2:], roi.dtype)
+        cv2.resize(roi, (sw, sh), dst=small, interpolation=cv2.INTER_AREA)
+        return cv2.resize(small, (rw, rh), dst=out, interpolation=cv2.INTER_NEAREST)
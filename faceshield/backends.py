@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+
+
+BACKENDS = ("pytorch", "onnx", "openvino")
+PRECISIONS = ("fp32", "fp16", "int8")
+
+# Precisions each export format can produce on a CPU-only machine
+# (PyTorch itself uses the existing half-precision switch instead)
+SUPPORTED = {
+    "onnx": ("fp32",),
+    "openvino": ("fp32", "fp16", "int8"),
+}
+
+
+def artifact_path(weights, backend, imgsz, precision="fp32"):
+    """Where the exported model for ``weights`` is cached (next to the .pt).
+
+    One artifact per backend / imgsz / precision. The suffixes are the ones
+    Ultralytics uses to recognise the format when loading it back.
+    """
+    stem = os.path.splitext(os.path.abspath(weights))[0]
+    tag = f"{stem}_{int(imgsz)}_{precision}"
+    if backend == "onnx":
+        return tag + ".onnx"
+    if backend == "openvino":
+        return tag + "_openvino_model"
+    raise ValueError(f"Unknown export backend: {backend}")
+
+
+def export_model(weights, backend, imgsz, precision="fp32", calib_data=""):
+    """Export ``weights`` once and return the cached artifact path."""
+    target = artifact_path(weights, backend, imgsz, precision)
+    if os.path.exists(target):
+        return target
+
+    from ultralytics import YOLO
+
+    kwargs = {"imgsz": int(imgsz), "dynamic": True}
+    if backend == "onnx":
+        kwargs.update(format="onnx", simplify=True)
+    else:
+        kwargs.update(format="openvino", half=precision == "fp16", int8=precision == "int8")
+        if precision == "int8" and calib_data:
+            kwargs["data"] = calib_data
+
+    # Ultralytics writes <stem>.onnx / <stem>_openvino_model next to the weights
+    # it is given, for every imgsz. Exporting a copy in a scratch folder keeps
+    # the user's own exports with those names untouched; only our result is
+    # moved to the per-imgsz name (same folder, so the move is a rename).
+    with tempfile.TemporaryDirectory(prefix=".export_", dir=os.path.dirname(target)) as tmp:
+        copy = os.path.join(tmp, os.path.basename(weights))
+        try:
+            os.link(weights, copy)
+        except OSError:
+            shutil.copyfile(weights, copy)
+        exported = YOLO(copy).export(**kwargs)
+        if not exported or not os.path.exists(exported):
+            raise RuntimeError(f"Exporting {weights} to {backend} failed.")
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        shutil.move(exported, target)
+    return target
+
+
+def load_model(weights, backend="pytorch", imgsz=640, precision="fp32", device="cpu", calib_data=""):
+    """Load ``weights`` for inference on ``backend``.
+
+    ``pytorch`` loads the .pt directly; ``onnx`` (ONNX Runtime) and ``openvino``
+    reuse an exported artifact cached next to the weights, exporting it on the
+    first run for this imgsz / precision.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    # Imported here: ultralytics pulls in torch, seconds of start-up for any importer
+    from ultralytics import YOLO
+
+    if backend == "pytorch":
+        return YOLO(weights).to(device)
+
+    if precision not in SUPPORTED[backend]:
+        raise ValueError(
+            f"{backend} does not support {precision} here (use {', '.join(SUPPORTED[backend])})."
+        )
+    return YOLO(export_model(weights, backend, imgsz, precision, calib_data), task="detect")
@@ -0,0 +1,42 @@
+from collections import deque
+
+import numpy as np
+
+
+class FramePool:
+    """Recycled BGR frame buffers of one size.
+
+    The decoder reads into :meth:`acquire`-d buffers (``cap.read(buf)``) and the
+    encoder hands them back with :meth:`release` once written, so a video is
+    processed with a fixed set of frames instead of one fresh allocation per
+    frame. ``prealloc`` buffers are created up front; when all are in flight
+    :meth:`acquire` allocates another one rather than block, so the pool size
+    settles at the number of frames the pipeline can hold at once.
+    ``acquire`` and ``release`` may be called from different threads.
+    """
+
+    def __init__(self, w, h, prealloc=0):
+        self.shape = (int(h), int(w), 3)
+        self.allocated = 0
+        self._free = deque()
+        for _ in range(int(prealloc)):
+            self._free.append(self._new())
+
+    def _new(self):
+        self.allocated += 1
+        return np.empty(self.shape, dtype=np.uint8)
+
+    def acquire(self):
+        try:
+            return self._free.pop()
+        except IndexError:
+            return self._new()
+
+    def release(self, frame):
+        # Frames OpenCV had to reallocate (size change) are simply dropped
+        if frame is not None and frame.shape == self.shape and frame.flags.c_contiguous:
+            self._free.append(frame)
+
+    @property
+    def nbytes(self):
+        return self.allocated * int(np.prod(self.shape))
@@ -0,0 +1,211 @@
+import dataclasses
+import hashlib
+import json
+import math
+import os
+import shutil
+import time
+
+from .detcache import file_fingerprint
+from .engine import probe_video
+from .segments import concat_videos, keyframe_times, plan_segments
+
+
+CHECKPOINT_VERSION = 1
+
+# Settings that do not change the written frames (the model file is fingerprinted instead)
+NOT_HASHED = ("model", "cache", "cache_dir", "workers", "profile")
+
+
+def settings_hash(settings) -> str:
+    """Hash of every setting that changes the output (plus the chunk length)."""
+    values = {k: v for k, v in dataclasses.asdict(settings).items() if k not in NOT_HASHED}
+    return hashlib.blake2b(json.dumps(values, sort_keys=True).encode(), digest_size=10).hexdigest()
+
+
+def checkpoint_dir(dst) -> str:
+    """``dir/out.mp4`` -> ``dir/out.checkpoint`` (chunks and manifest of ``dst``)."""
+    return os.path.splitext(os.path.abspath(dst))[0] + ".checkpoint"
+
+
+class Checkpoint:
+    """Progress manifest and finished chunk files of one resumable run.
+
+    ``manifest.json`` records the source and model fingerprints, the settings
+    hash, the chunk plan (frame ranges) and how many chunks are complete; it
+    is rewritten atomically after each chunk has been finalized, so it never
+    lists a chunk that is not fully on disk. A manifest written for another
+    source, model or settings is not resumed from.
+    """
+
+    def __init__(self, dst, src, settings):
+        self.dir = checkpoint_dir(dst)
+        self.ext = os.path.splitext(dst)[1] or ".mp4"
+        self.path = os.path.join(self.dir, "manifest.json")
+        self.key = {
+            "version": CHECKPOINT_VERSION,
+            "source": file_fingerprint(src),
+            "model": file_fingerprint(settings.model),
+            "settings": settings_hash(settings),
+        }
+        self.chunks = []
+        self.done = 0
+
+    def chunk_path(self, i):
+        return os.path.join(self.dir, f"chunk_{i:05d}{self.ext}")
+
+    @property
+    def next_frame(self):
+        return self.chunks[self.done][0] if self.done < len(self.chunks) else self.chunks[-1][1]
+
+    def load(self) -> str:
+        """Resume state from the manifest; returns why it was not usable ("" when resumed)."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                m = json.load(f)
+        except FileNotFoundError:
+            return "no checkpoint"
+        except (OSError, ValueError):
+            return "unreadable manifest"
+        for name in ("version", "source", "model", "settings"):
+            if m.get(name) != self.key[name]:
+                return f"{name} changed"
+        self.chunks = [tuple(c) for c in m.get("chunks", [])]
+        self.done = 0
+        # Only chunks whose files survived count, in order
+        while (self.done < min(int(m.get("done", 0)), len(self.chunks))
+               and os.path.isfile(self.chunk_path(self.done))):
+            self.done += 1
+        return "" if self.chunks else "empty plan"
+
+    def start(self, chunks):
+        """New plan: drop old chunk files and write a fresh manifest."""
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir, exist_ok=True)
+        self.chunks = list(chunks)
+        self.done = 0
+        self.save()
+
+    def save(self):
+        m = dict(self.key, chunks=self.chunks, done=self.done, next_frame=self.next_frame)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(m, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def complete(self, i):
+        self.done = i + 1
+        self.save()
+
+    def remove(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+class _ChunkMetrics:
+    """Forwards a chunk run's counters to the whole-video channel (``start`` is ignored)."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def start(self, total):
+        pass
+
+    def add(self, stage, n=1):
+        self.metrics.add(stage, n)
+
+
+def process_checkpointed(engine, src, dst, on_progress=None, on_frame=None, should_stop=None,
+                         metrics=None) -> bool:
+    """Process ``src`` as ``settings.checkpoint_s`` second chunks that survive a crash or Stop.
+
+    Every chunk is encoded to its own file in :func:`checkpoint_dir` and
+    finalized before the manifest counts it. A later call with the same
+    source, model and settings skips the completed chunks and continues at the
+    first missing one; chunk boundaries come from the saved plan, so the
+    result is the same file an uninterrupted run writes (except with adaptive
+    speed, which is timing dependent). Once all chunks exist they are joined
+    into ``dst`` and the checkpoint folder is removed.
+
+    Callbacks behave as in :meth:`Engine.process_video`. Chunks are processed
+    one after another (``settings.workers`` is ignored), profiling is off and
+    the detection cache is read but not written.
+    """
+    s = engine.settings
+    t_call = time.perf_counter()
+    fps, w, h, total_frames = probe_video(src)
+    if total_frames <= 0:
+        raise RuntimeError("Checkpointed processing needs a known frame count.")
+
+    ckpt = Checkpoint(dst, src, s)
+    reason = ckpt.load()
+    notes = []
+    if reason:
+        # Keyframe-aligned cuts: every chunk starts decoding exactly where it should
+        n = math.ceil(total_frames / max(1, round(s.checkpoint_s * fps)))
+        ckpt.start(plan_segments(total_frames, n, fps, keyframe_times(src)))
+        if reason != "no checkpoint":
+            notes.append(f"checkpoint: {reason}, started over")
+    else:
+        notes.append(
+            f"checkpoint: resumed at frame {ckpt.next_frame} "
+            f"({ckpt.done} of {len(ckpt.chunks)} chunks already done)"
+        )
+
+    resumed_at = ckpt.next_frame
+    done_frames = resumed_at
+    if metrics is not None:
+        metrics.start(total_frames)
+        for stage in metrics.counts:
+            metrics.set(stage, done_frames)
+    chunk_metrics = _ChunkMetrics(metrics) if metrics is not None else None
+    t0 = time.time()
+
+    first_frame_s = None
+    engine.settings = dataclasses.replace(s, profile=False)
+    try:
+        for i in range(ckpt.done, len(ckpt.chunks)):
+            a, b = ckpt.chunks[i]
+
+            def chunk_progress(p, _remaining, a=a, b=b):
+                processed = done_frames + p * (b - a)
+                elapsed = time.time() - t0
+                fps_proc = (processed - resumed_at) / elapsed if elapsed > 0 else 0.0
+                remaining = (total_frames - processed) / fps_proc if fps_proc > 0 else -1
+                on_progress(processed / total_frames, remaining)
+
+            part = ckpt.chunk_path(i)
+            t_chunk = time.perf_counter()
+            ok = engine.process_video(
+                src, part,
+                on_progress=chunk_progress if on_progress is not None else None,
+                on_frame=on_frame, should_stop=should_stop, start=a, end=b, metrics=chunk_metrics
+            )
+            if first_frame_s is None and engine.first_frame_s is not None:
+                first_frame_s = t_chunk - t_call + engine.first_frame_s
+            if not ok:
+                # Unfinished chunk: redone from its first frame next time
+                if os.path.exists(part):
+                    os.remove(part)
+                notes.append(
+                    f"checkpoint: stopped; {ckpt.done} of {len(ckpt.chunks)} chunks kept in {ckpt.dir}"
+                )
+                return False
+            ckpt.complete(i)
+            done_frames = b
+    finally:
+        engine.settings = s
+        engine.first_frame_s = first_frame_s
+        if first_frame_s is not None:
+            notes.insert(0, f"first frame written after {first_frame_s:.2f}s")
+        engine.last_report = "\n".join(notes)
+
+    # Written under a temporary name: a crash here never leaves a truncated dst
+    stem, ext = os.path.splitext(dst)
+    tmp = f"{stem}.partial{ext or '.mp4'}"
+    parts = [ckpt.chunk_path(i) for i in range(len(ckpt.chunks))]
+    concat_videos(parts, tmp, fps, w, h, audio_src=src if s.encoder == "ffmpeg" else None)
+    os.replace(tmp, dst)
+    ckpt.remove()
+    if on_progress is not None:
+        on_progress(1.0, 0)
+    return True
@@ -0,0 +1,288 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+from .anonymize import METHODS, SHAPES
+from .backends import BACKENDS, PRECISIONS
+from .encoders import CODECS, ENCODERS, PRESETS
+from .engine import Engine, Settings, VIDEO_EXTS
+from .utils import fmt_time
+
+
+def expand_inputs(patterns):
+    """Resolve files, directories and glob patterns into a sorted list of videos."""
+    found = []
+    for pat in patterns:
+        if os.path.isdir(pat):
+            for name in sorted(os.listdir(pat)):
+                fp = os.path.join(pat, name)
+                if os.path.isfile(fp) and name.lower().endswith(VIDEO_EXTS):
+                    found.append(fp)
+        elif os.path.isfile(pat):
+            found.append(pat)
+        else:
+            for fp in sorted(glob.glob(pat, recursive=True)):
+                # Chunks of an unfinished resumable run are not inputs
+                if os.path.dirname(fp).endswith(".checkpoint"):
+                    continue
+                if os.path.isfile(fp) and fp.lower().endswith(VIDEO_EXTS):
+                    found.append(fp)
+
+    # De-duplicate while keeping order
+    seen = set()
+    out = []
+    for fp in found:
+        key = os.path.abspath(fp)
+        if key not in seen:
+            seen.add(key)
+            out.append(fp)
+    return out
+
+
+def output_path_for(src, output_dir, suffix, ext):
+    stem = os.path.splitext(os.path.basename(src))[0]
+    folder = output_dir if output_dir else os.path.dirname(os.path.abspath(src))
+    return os.path.join(folder, f"{stem}{suffix}{ext}")
+
+
+def build_parser():
+    d = Settings()
+    ap = argparse.ArgumentParser(
+        prog="faceshield",
+        description="Face Shield AI (POWEREN) - headless face blurring for videos and images."
+    )
+    ap.add_argument("inputs", nargs="+",
+                    help="Video files, directories or glob patterns (with --live: one camera index, URL or file).")
+    ap.add_argument("-o", "--output-dir", default="",
+                    help="Folder for blurred videos (default: next to each input).")
+    ap.add_argument("--suffix", default="_blurred", help="Appended to the output file name.")
+    ap.add_argument("--ext", default=".mp4", choices=[".mp4", ".avi", ".mkv"], help="Output container.")
+    ap.add_argument("--overwrite", action="store_true", help="Re-process files whose output exists.")
+
+    ap.add_argument("-m", "--model", default=d.model, help="YOLO face model weights (.pt).")
+    ap.add_argument("--conf", type=float, default=d.conf, help="Confidence threshold.")
+    ap.add_argument("--iou", type=float, default=d.iou, help="NMS IOU threshold.")
+    ap.add_argument("--imgsz", type=int, default=d.imgsz, help="Inference image size.")
+    ap.add_argument("--blur", type=int, default=d.blur, help="Gaussian blur kernel size (odd).")
+    ap.add_argument("--backend", default=d.backend, choices=BACKENDS,
+                    help="Inference runtime. onnx/openvino export the .pt once per imgsz and cache it.")
+    ap.add_argument("--precision", default=d.precision, choices=PRECISIONS,
+                    help="Precision of the exported onnx/openvino model.")
+    ap.add_argument("--calib-data", default=d.calib_data,
+                    help="Dataset yaml used to calibrate int8 OpenVINO exports.")
+    ap.add_argument("--method", default=d.method, choices=METHODS,
+                    help="How faces are hidden: gaussian (classic), fast, box, pixelate or fill.")
+    ap.add_argument("--shape", default=d.shape, choices=SHAPES, help="Anonymized area per face.")
+    ap.add_argument("--half", action=argparse.BooleanOptionalAction, default=d.half,
+                    help="Half precision (only used on CUDA).")
+    ap.add_argument("--encoder", default=d.encoder, choices=ENCODERS,
+                    help="opencv (mp4v/XVID) or ffmpeg (pipe to libx264/libx265, keeps the source audio).")
+    ap.add_argument("--codec", default=d.codec, choices=CODECS, help="ffmpeg video codec.")
+    ap.add_argument("--preset", default=d.preset, choices=PRESETS, help="ffmpeg encoder preset.")
+    ap.add_argument("--crf", type=int, default=d.crf, help="ffmpeg constant rate factor (lower = better).")
+    ap.add_argument("--batch", type=int, default=d.batch,
+                    help="Frames per detector call (bigger batches use more CPU cores).")
+    ap.add_argument("--tiles", type=int, default=d.tiles,
+                    help="Tiled detection: N overlapping columns per frame, each run at --imgsz (0 = off).")
+    ap.add_argument("--tile-overlap", type=float, default=d.tile_overlap,
+                    help="Overlap between neighbouring tiles, as a fraction of a tile.")
+    ap.add_argument("--coarse-imgsz", type=int, default=d.coarse_imgsz,
+                    help="Extra full-frame pass at this imgsz in tiled mode (0 = off).")
+    ap.add_argument("--interval", type=int, default=d.interval,
+                    help="Run the detector every N frames and track faces in between.")
+    ap.add_argument("--track-pad", type=float, default=d.track_pad,
+                    help="Extra margin around tracked boxes, as a fraction of box size.")
+    ap.add_argument("--motion", action="store_true",
+                    help="Skip detection on static frames and only detect moving regions (fixed cameras).")
+    ap.add_argument("--cache", action=argparse.BooleanOptionalAction, default=d.cache,
+                    help="Reuse / write per-video detection sidecar files (.dets.npz).")
+    ap.add_argument("--cache-dir", default=d.cache_dir,
+                    help="Folder for detection sidecars (default: next to each video).")
+    ap.add_argument("--workers", type=int, default=d.workers,
+                    help="Split each video into N segments processed by parallel processes.")
+    ap.add_argument("--checkpoint", type=float, default=d.checkpoint_s, metavar="SECONDS",
+                    help="Resumable runs: write chunks of this length plus a manifest; "
+                         "a rerun continues after the last finished chunk (0 = off).")
+    ap.add_argument("--target-fps", type=float, default=d.target_fps,
+                    help="Adaptive speed: lower imgsz / detection rate to reach this fps (0 = off).")
+    ap.add_argument("--deadline", type=float, default=d.deadline_s,
+                    help="Adaptive speed: finish each video within this many seconds (0 = off).")
+    ap.add_argument("--images", action="store_true",
+                    help="Image mode: inputs are images, folders (recursive), globs or .zip/.tar archives; "
+                         "outputs keep their format and EXIF orientation.")
+    ap.add_argument("--threads", type=int, default=0,
+                    help="Image mode: decode / encode threads (default: one per CPU).")
+    ap.add_argument("--live", action="store_true",
+                    help="Live mode: anonymize a camera (0), rtsp:// / http:// stream or a file replayed in real time.")
+    ap.add_argument("--live-output", default="",
+                    help="Live output file (numbered per segment) or '-' for raw bgr24 frames on stdout.")
+    ap.add_argument("--latency-ms", type=int, default=500,
+                    help="Live end-to-end latency budget; later frames are tracked or dropped.")
+    ap.add_argument("--segment-s", type=int, default=60, help="Live output segment length (0 = one file).")
+    ap.add_argument("--profile", action="store_true",
+                    help="Time every stage; prints a summary and writes <output>.profile.txt/.json (Chrome trace).")
+    return ap
+
+
+def settings_from_args(args) -> Settings:
+    return Settings(
+        model=args.model,
+        conf=args.conf,
+        iou=args.iou,
+        imgsz=args.imgsz,
+        blur=args.blur,
+        half=args.half,
+        backend=args.backend,
+        precision=args.precision,
+        calib_data=args.calib_data,
+        method=args.method,
+        shape=args.shape,
+        batch=args.batch,
+        tiles=args.tiles,
+        tile_overlap=args.tile_overlap,
+        coarse_imgsz=args.coarse_imgsz,
+        interval=args.interval,
+        track_pad=args.track_pad,
+        motion=args.motion,
+        cache=args.cache,
+        cache_dir=args.cache_dir,
+        workers=args.workers,
+        encoder=args.encoder,
+        codec=args.codec,
+        preset=args.preset,
+        crf=args.crf,
+        profile=args.profile,
+        target_fps=args.target_fps,
+        deadline_s=args.deadline,
+        checkpoint_s=args.checkpoint,
+    )
+
+
+def run_live(args) -> int:
+    from .live import live_output_name
+
+    if len(args.inputs) != 1:
+        print("--live takes exactly one source.", file=sys.stderr)
+        return 2
+    source = args.inputs[0]
+    dst = args.live_output or os.path.join(args.output_dir, live_output_name(source))
+    if args.output_dir and dst != "-":
+        os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+
+    # stdout may carry the video: all messages go to stderr
+    engine = Engine(settings_from_args(args))
+    print(f"Live: {source} -> {dst} (budget {args.latency_ms} ms), Ctrl+C to stop", file=sys.stderr)
+
+    def on_stats(stats):
+        print(f"\r  {stats.line()}", end="", file=sys.stderr, flush=True)
+
+    try:
+        stats = engine.process_live(
+            source, dst, latency_ms=args.latency_ms, segment_s=args.segment_s, on_stats=on_stats
+        )
+    except KeyboardInterrupt:
+        print("\nStopped by user.", file=sys.stderr)
+        return 130
+    except Exception as e:
+        print(f"\n  error: {e}", file=sys.stderr)
+        return 1
+    print(f"\n  held {stats.held} frame(s), {stats.late} over budget", file=sys.stderr)
+    return 0
+
+
+def run_images(args) -> int:
+    from .images import expand_images, process_images
+
+    items = expand_images(args.inputs, args.output_dir, args.suffix)
+    if not items:
+        print("No input images found.", file=sys.stderr)
+        return 2
+
+    t_load = time.time()
+    engine = Engine(settings_from_args(args))
+    print(f"Loaded {args.model} on {engine.device} in {time.time() - t_load:.1f}s")
+    print(f"{len(items)} image(s)")
+    last = [0.0]
+
+    def on_progress(p, remaining):
+        now = time.time()
+        if now - last[0] < 1.0 and p < 1.0:
+            return
+        last[0] = now
+        eta_txt = fmt_time(remaining) if remaining >= 0 else "--:--"
+        print(f"\r  {int(p * 100):3d}%  |  ETA: {eta_txt}", end="", flush=True)
+
+    try:
+        stats = process_images(
+            engine, items, overwrite=args.overwrite, on_progress=on_progress, threads=args.threads
+        )
+    except KeyboardInterrupt:
+        print("\nStopped by user.")
+        return 130
+    print(f"\n  {stats.line()}")
+    for line in stats.errors:
+        print(f"  error: {line}", file=sys.stderr)
+    return 1 if stats.failed else 0
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.live or args.images:
+        if not os.path.exists(args.model):
+            print(f"Model not found: {args.model}", file=sys.stderr)
+            return 2
+        return run_live(args) if args.live else run_images(args)
+
+    videos = expand_inputs(args.inputs)
+    if not videos:
+        print("No input videos found.", file=sys.stderr)
+        return 2
+    if not os.path.exists(args.model):
+        print(f"Model not found: {args.model}", file=sys.stderr)
+        return 2
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    t_load = time.time()
+    engine = Engine(settings_from_args(args))
+    print(f"Loaded {args.model} on {engine.device} in {time.time() - t_load:.1f}s")
+
+    failed = 0
+    for i, src in enumerate(videos, 1):
+        dst = output_path_for(src, args.output_dir, args.suffix, args.ext)
+        if os.path.exists(dst) and not args.overwrite:
+            print(f"[{i}/{len(videos)}] skip (exists): {dst}")
+            continue
+
+        print(f"[{i}/{len(videos)}] {src} -> {dst}")
+        last = [0.0]
+
+        def on_progress(p, remaining):
+            now = time.time()
+            if now - last[0] < 1.0 and p < 1.0:
+                return
+            last[0] = now
+            eta_txt = fmt_time(remaining) if remaining >= 0 else "--:--"
+            print(f"\r  {int(p * 100):3d}%  |  ETA: {eta_txt}", end="", flush=True)
+
+        t0 = time.time()
+        try:
+            engine.process_video(src, dst, on_progress=on_progress)
+        except KeyboardInterrupt:
+            print("\nStopped by user.")
+            if args.checkpoint > 0:
+                print("  Finished chunks are kept; run the same command again to resume.")
+            return 130
+        except Exception as e:
+            failed += 1
+            print(f"\n  error: {e}", file=sys.stderr)
+            continue
+        print(f"\n  done in {fmt_time(time.time() - t0)}")
+        if engine.last_profile is not None:
+            print(engine.last_profile.summary())
+        for line in engine.last_report.splitlines():
+            print(f"  {line}")
+
+    return 1 if failed else 0
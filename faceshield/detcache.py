@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+CACHE_VERSION = 1
+
+# Bytes hashed at the start / middle / end of a file for its fingerprint
+SAMPLE_BYTES = 1 << 20
+
+
+def file_fingerprint(path) -> str:
+    """Cheap content fingerprint: file size plus three sampled 1 MiB chunks.
+
+    Hashing a multi-GB video completely would cost about as much as decoding
+    it; sampling catches re-encodes and edits while staying in the ms range.
+    """
+    size = os.path.getsize(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(size).encode())
+    with open(path, "rb") as f:
+        for pos in (0, max(0, size // 2 - SAMPLE_BYTES // 2), max(0, size - SAMPLE_BYTES)):
+            f.seek(pos)
+            h.update(f.read(SAMPLE_BYTES))
+    return h.hexdigest()
+
+
+class Detections:
+    """Per-frame detections loaded from a cache, already filtered by ``conf``."""
+
+    def __init__(self, xyxy, conf, offsets):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        """Integer ``(N, 4)`` xyxy array of frame ``i`` (or ``None``)."""
+        if i < 0 or i >= len(self):
+            return None
+        a, b = self.offsets[i], self.offsets[i + 1]
+        if a == b:
+            return None
+        return self.xyxy[a:b].astype(int)
+
+
+class DetectionCache:
+    """Sidecar ``.npz`` holding the raw detections of one video.
+
+    The file name is keyed by the video and model fingerprints plus every
+    setting that changes what the detector returns (``params``: iou, imgsz,
+    backend, precision or half, ...). The confidence threshold is stored inside instead: a cache built at
+    ``conf`` serves any run with a threshold >= ``conf`` by filtering, since
+    NMS never lets a lower-scored box suppress a higher-scored one.
+    """
+
+    def __init__(self, video, model, params, cache_dir=""):
+        self.video = video
+        key = hashlib.blake2b(digest_size=10)
+        key.update(file_fingerprint(video).encode())
+        key.update(file_fingerprint(model).encode())
+        key.update(json.dumps(params, sort_keys=True).encode())
+        key.update(str(CACHE_VERSION).encode())
+
+        folder = cache_dir or os.path.dirname(os.path.abspath(video))
+        stem = os.path.basename(video)
+        self.path = os.path.join(folder, f"{stem}.{key.hexdigest()}.dets.npz")
+
+    def load(self, conf):
+        """Return :class:`Detections` for threshold ``conf``, or ``None`` on a miss."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with np.load(self.path) as z:
+                if int(z["version"]) != CACHE_VERSION or float(z["conf"]) > conf + 1e-6:
+                    return None
+                frame_index = z["frame_index"]
+                xyxy = z["xyxy"]
+                scores = z["conf_scores"]
+                total = int(z["n_frames"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+        keep = scores >= conf
+        frame_index, xyxy, scores = frame_index[keep], xyxy[keep], scores[keep]
+        offsets = np.searchsorted(frame_index, np.arange(total + 1)).astype(np.int64)
+        return Detections(xyxy, scores, offsets)
+
+    def save(self, conf, frames):
+        """Write ``frames`` (a list of ``(xyxy, scores)`` per frame) to the sidecar."""
+        n = len(frames)
+        counts = [0 if b is None else len(b) for b, _ in frames]
+        frame_index = np.repeat(np.arange(n, dtype=np.int32), counts)
+        if sum(counts):
+            xyxy = np.concatenate([b for b, _ in frames if b is not None and len(b)]).astype(np.float32)
+            scores = np.concatenate([c for b, c in frames if b is not None and len(b)]).astype(np.float32)
+        else:
+            xyxy = np.zeros((0, 4), dtype=np.float32)
+            scores = np.zeros((0,), dtype=np.float32)
+
+        tmp = self.path + ".tmp.npz"
+        np.savez_compressed(
+            tmp,
+            version=np.int32(CACHE_VERSION),
+            conf=np.float32(conf),
+            n_frames=np.int64(n),
+            frame_index=frame_index,
+            xyxy=xyxy,
+            conf_scores=scores,
+        )
+        os.replace(tmp, self.path)
@@ -0,0 +1,198 @@
+import os
+import shutil
+import subprocess
+
+import cv2
+import numpy as np
+
+
+ENCODERS = ("opencv", "ffmpeg")
+CODECS = ("libx264", "libx265")
+PRESETS = (
+    "ultrafast", "superfast", "veryfast", "faster", "fast",
+    "medium", "slow", "slower", "veryslow"
+)
+
+
+def ffmpeg_exe():
+    exe = shutil.which("ffmpeg")
+    if not exe:
+        raise RuntimeError("ffmpeg was not found on PATH. Install it or use the OpenCV encoder.")
+    return exe
+
+
+def open_cv_writer(out, fps, w, h):
+    ext = os.path.splitext(out)[1].lower()
+    if ext == ".avi":
+        fourcc = cv2.VideoWriter_fourcc(*"XVID")
+    else:
+        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+
+    writer = cv2.VideoWriter(out, fourcc, fps, (w, h))
+    if not writer.isOpened():
+        raise RuntimeError("Could not open output writer. Try another path or .avi output.")
+    return writer
+
+
+class FFmpegWriter:
+    """Streams raw BGR frames to an ffmpeg process over a pipe.
+
+    Drop-in for ``cv2.VideoWriter`` (``write`` / ``release`` / ``isOpened``).
+    Frames are handed to the pipe through their buffer without conversion;
+    non-contiguous frames are first copied into one preallocated buffer. When
+    ``audio_src`` is given, its audio track is copied into the output
+    unchanged, so no separate remux pass is needed.
+    """
+
+    def __init__(self, out, fps, w, h, codec="libx264", preset="medium", crf=23, audio_src=None):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec}")
+        self.out = out
+        self.shape = (h, w, 3)
+        self._buf = np.empty(self.shape, dtype=np.uint8)
+
+        cmd = [
+            ffmpeg_exe(), "-v", "error", "-nostdin", "-y",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{w}x{h}", "-r", f"{fps:.6g}", "-i", "pipe:0",
+        ]
+        if audio_src:
+            cmd += ["-i", audio_src, "-map", "0:v:0", "-map", "1:a?", "-c:a", "copy", "-shortest"]
+        cmd += ["-c:v", codec, "-preset", preset, "-crf", str(int(crf)), "-pix_fmt", "yuv420p"]
+        if w % 2 or h % 2:
+            # yuv420p needs even dimensions
+            cmd += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"]
+        if codec == "libx265":
+            cmd += ["-tag:v", "hvc1", "-x265-params", "log-level=error"]
+        if os.path.splitext(out)[1].lower() in (".mp4", ".mov"):
+            cmd += ["-movflags", "+faststart"]
+        cmd.append(out)
+
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def isOpened(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def write(self, frame):
+        if frame.shape != self.shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match writer {self.shape}.")
+        buf = frame
+        if not (frame.flags.c_contiguous and frame.dtype == np.uint8):
+            np.copyto(self._buf, frame, casting="unsafe")
+            buf = self._buf
+        try:
+            self.proc.stdin.write(buf.data)
+        except (BrokenPipeError, OSError):
+            raise RuntimeError(f"ffmpeg stopped while encoding: {self._errors()}")
+
+    def release(self):
+        if self.proc is None:
+            return
+        proc, self.proc = self.proc, None
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        err = proc.stderr.read().decode(errors="replace").strip()
+        code = proc.wait()
+        if code != 0:
+            raise RuntimeError(f"ffmpeg failed ({code}): {err[-500:]}")
+
+    def _errors(self):
+        try:
+            self.proc.stdin.close()
+            return self.proc.stderr.read().decode(errors="replace").strip()[-500:]
+        except OSError:
+            return "unknown error"
+
+
+class SegmentWriter:
+    """Splits the output into files of ``frames_per_segment`` frames each.
+
+    ``open_segment(i)`` opens the writer of segment ``i``; every segment is
+    finalized (released) before the next one starts, so completed files can be
+    picked up while recording goes on.
+    """
+
+    def __init__(self, open_segment, frames_per_segment):
+        self.open_segment = open_segment
+        self.frames_per_segment = max(1, int(frames_per_segment))
+        self.index = 0
+        self.count = 0
+        self.writer = None
+
+    def isOpened(self):
+        return True
+
+    def write(self, frame):
+        if self.writer is None:
+            self.writer = self.open_segment(self.index)
+        self.writer.write(frame)
+        self.count += 1
+        if self.count >= self.frames_per_segment:
+            self.writer.release()
+            self.writer = None
+            self.count = 0
+            self.index += 1
+
+    def release(self):
+        if self.writer is not None:
+            writer, self.writer = self.writer, None
+            writer.release()
+
+
+def segment_path(out, index):
+    """``dir/name.mp4`` -> ``dir/name_00012.mp4`` for segment 12."""
+    stem, ext = os.path.splitext(out)
+    return f"{stem}_{index:05d}{ext or '.mp4'}"
+
+
+class PipeWriter:
+    """Writes raw ``bgr24`` frames to a binary stream (e.g. stdout) for another program.
+
+    Read it with e.g. ``ffmpeg -f rawvideo -pix_fmt bgr24 -s WxH -r FPS -i -``.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def isOpened(self):
+        return self.stream is not None
+
+    def write(self, frame):
+        try:
+            self.stream.write(np.ascontiguousarray(frame).data)
+        except (BrokenPipeError, OSError):
+            raise RuntimeError("The output pipe was closed by the reader.")
+
+    def release(self):
+        if self.stream is not None:
+            try:
+                self.stream.flush()
+            except OSError:
+                pass
+            self.stream = None
+
+
+def release_writer(writer, error=None):
+    """``writer.release()`` that never hides ``error``, an exception already propagating.
+
+    When finalizing the output fails as well, that failure becomes the cause of
+    ``error`` (a dead ffmpeg is often why the pipeline failed) and ``error``
+    keeps propagating; without ``error`` it is raised as usual.
+    """
+    try:
+        writer.release()
+    except Exception as e:
+        if error is None:
+            raise
+        if error.__cause__ is None:
+            error.__cause__ = e
+
+
+def open_writer(out, fps, w, h, encoder="opencv", codec="libx264", preset="medium", crf=23, audio_src=None):
+    """Open a frame writer for ``out``; ``audio_src`` is only used by ffmpeg."""
+    if encoder == "ffmpeg":
+        return FFmpegWriter(out, fps, w, h, codec, preset, crf, audio_src)
+    if encoder != "opencv":
+        raise ValueError(f"Unknown encoder: {encoder}")
+    return open_cv_writer(out, fps, w, h)
@@ -0,0 +1,584 @@
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from .adaptive import SpeedController
+from .anonymize import Anonymizer
+from .backends import load_model
+from .buffers import FramePool
+from .detcache import DetectionCache
+from .encoders import PipeWriter, SegmentWriter, open_writer, release_writer, segment_path
+from .motion import MotionGate, detect_gated
+from .pipeline import run_pipeline
+from .profiler import Profiler, span_of
+from .tiling import detect_tiled
+from .tracker import BoxTracker
+
+
+VIDEO_EXTS = (".mp4", ".avi", ".mkv", ".mov")
+
+# Frames buffered between two pipeline stages (rounded to whole batches)
+QUEUE_FRAMES = 8
+
+# Adaptive speed changes listed in last_report (most recent ones)
+ADAPTIVE_LOG_LINES = 10
+
+
+@dataclass
+class Settings:
+    """Detection / blur settings shared by the GUI and the CLI."""
+
+    model: str = "yolov8l_100e.pt"
+    conf: float = 0.20
+    iou: float = 0.45
+    imgsz: int = 1280
+    blur: int = 75
+    half: bool = True
+    # Inference runtime: pytorch, onnx (ONNX Runtime CPU) or openvino (CPU)
+    backend: str = "pytorch"
+    # Precision of exported onnx / openvino models: fp32, fp16 or int8
+    precision: str = "fp32"
+    # Calibration dataset yaml for int8 exports (Ultralytics default if empty)
+    calib_data: str = ""
+    # How faces are hidden (see faceshield.anonymize.Anonymizer)
+    method: str = "gaussian"
+    shape: str = "rect"
+    batch: int = 1
+    # Tiled detection: split frames into this many overlapping columns (0/1 = off)
+    tiles: int = 0
+    tile_overlap: float = 0.2
+    # Extra low-resolution full-frame pass in tiled mode (0 = off)
+    coarse_imgsz: int = 0
+    # Run the detector every N frames and track boxes in between (1 = every frame)
+    interval: int = 1
+    track_pad: float = 0.15
+    # Skip / crop detection on static frames and regions (fixed cameras)
+    motion: bool = False
+    # Keep per-frame detections in a sidecar file and reuse them on re-renders
+    cache: bool = True
+    cache_dir: str = ""
+    # Output encoder: opencv (mp4v / XVID) or ffmpeg (pipe, copies the source audio)
+    encoder: str = "opencv"
+    codec: str = "libx264"
+    preset: str = "medium"
+    crf: int = 23
+    # Split the video into this many segments processed by parallel processes
+    workers: int = 1
+    # Record per-stage timings; writes <output>.profile.txt / .profile.json
+    profile: bool = False
+    # Adaptive speed: tune imgsz / interval to reach this fps, or to finish within
+    # deadline_s seconds (0 = off); settings.imgsz is the upper limit
+    target_fps: float = 0.0
+    deadline_s: float = 0.0
+    # Resumable runs: write the output in chunks of this many seconds plus a
+    # progress manifest, and continue from the last finished chunk (0 = off)
+    checkpoint_s: float = 0.0
+
+
+def pick_device() -> str:
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def probe_video(path: str):
+    """Return ``(fps, width, height, total_frames)`` for a video file."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open input video: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    if fps <= 0:
+        fps = 25
+    return fps, w, h, total_frames
+
+
+def _to_numpy(t):
+    if hasattr(t, "cpu"):
+        t = t.cpu()
+    return t.numpy()
+
+
+def boxes_to_arrays(boxes):
+    """Ultralytics ``Boxes`` -> ``(xyxy float (N, 4), conf (N,))`` or ``(None, None)``."""
+    if boxes is None or boxes.xyxy is None or len(boxes) == 0:
+        return None, None
+    return _to_numpy(boxes.xyxy), _to_numpy(boxes.conf)
+
+
+def read_batches(cap, batch_size, limit=None, pool=None):
+    """Yield lists of up to ``batch_size`` consecutive BGR frames from ``cap``.
+
+    Stops after ``limit`` frames when given. With a :class:`FramePool` frames
+    are decoded into its buffers; the consumer releases them back.
+    """
+    batch_size = max(1, int(batch_size))
+    left = limit
+    while left is None or left > 0:
+        want = batch_size if left is None else min(batch_size, left)
+        frames = []
+        while len(frames) < want:
+            buf = pool.acquire() if pool is not None else None
+            ok, frame = cap.read(buf)
+            if not ok:
+                if pool is not None:
+                    pool.release(buf)
+                break
+            frames.append(frame)
+        if not frames:
+            return
+        yield frames
+        if left is not None:
+            left -= len(frames)
+        if len(frames) < want:
+            return
+
+
+class Engine:
+    """Loads the YOLO face model once and runs detect -> blur -> encode on videos.
+
+    The model is kept on the instance, so processing many files with one engine
+    only pays the model start-up cost once.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        # Human-readable notes about the last process_video run (e.g. motion gate stats)
+        self.last_report = ""
+        # Profiler of the last process_video run with settings.profile (else None)
+        self.last_profile = None
+        self.profiler = None
+        # Start-up timings (seconds): model load, warmup() and, per run, the first written frame
+        self.load_s = 0.0
+        self.warmup_s = 0.0
+        self.first_frame_s = None
+        t = time.perf_counter()
+        # Exported runtimes are CPU-only here
+        self.device = pick_device() if settings.backend == "pytorch" else "cpu"
+        self.model = load_model(
+            settings.model, settings.backend, settings.imgsz, settings.precision,
+            device=self.device, calib_data=settings.calib_data
+        )
+        self.load_s = time.perf_counter() - t
+
+    @property
+    def half(self) -> bool:
+        return bool(self.settings.half) and (self.device == "cuda") and self.settings.backend == "pytorch"
+
+    def matches(self, settings: Settings) -> bool:
+        """True when ``settings`` can reuse this engine's loaded model."""
+        cur = self.settings
+        if os.path.abspath(settings.model) != os.path.abspath(cur.model) or settings.backend != cur.backend:
+            return False
+        if cur.backend == "pytorch":
+            return True
+        # Exported models are tied to the imgsz / precision they were built for
+        return settings.imgsz == cur.imgsz and settings.precision == cur.precision
+
+    def warmup(self, imgsz=None):
+        """Run one inference on a blank frame so the first real batch starts at full speed.
+
+        The first prediction initialises the runtime (kernel selection, memory
+        pools, lazy Ultralytics setup); doing it ahead of time moves that cost
+        out of the first run. Returns the engine.
+        """
+        imgsz = imgsz or self.settings.imgsz
+        t = time.perf_counter()
+        self.detect([np.zeros((imgsz, imgsz, 3), dtype=np.uint8)], imgsz)
+        self.warmup_s = time.perf_counter() - t
+        return self
+
+    def detect(self, frames, imgsz=None):
+        """Run the detector on a list of frames as one batch.
+
+        Returns one integer ``(N, 4)`` xyxy array (or ``None``) per frame, in
+        the same order as ``frames``. ``imgsz`` overrides ``settings.imgsz``.
+        """
+        return [None if xyxy is None else xyxy.astype(int) for xyxy, _ in self.detect_scored(frames, imgsz)]
+
+    def detect_scored(self, frames, imgsz=None):
+        """Like :meth:`detect` but returns ``(xyxy float, conf)`` pairs per frame."""
+        if not frames:
+            return []
+        s = self.settings
+        imgsz = imgsz or s.imgsz
+        if s.tiles > 1:
+            return detect_tiled(
+                self._predict, frames, imgsz, s.tiles, s.tile_overlap, s.coarse_imgsz, s.iou
+            )
+        return self._predict(frames, imgsz)
+
+    def _predict(self, images, imgsz):
+        s = self.settings
+        prof = self.profiler
+        t = time.perf_counter()
+        results = self.model.predict(
+            source=images,
+            conf=s.conf,
+            iou=s.iou,
+            imgsz=imgsz,
+            device=0 if self.device == "cuda" else "cpu",
+            half=self.half,
+            batch=len(images),
+            verbose=False
+        )
+        if prof is None:
+            return [boxes_to_arrays(res.boxes) for res in results]
+
+        # Ultralytics times its own steps (ms per image); lay them out in order
+        n = len(images)
+        speed = (getattr(results[0], "speed", None) or {}) if results else {}
+        for name, key in (("preprocess", "preprocess"), ("forward", "inference"), ("nms", "postprocess")):
+            dur = speed.get(key, 0.0) * n / 1000.0
+            prof.record("infer." + name, t, dur, n)
+            t += dur
+        with prof.span("infer.transfer", n):
+            return [boxes_to_arrays(res.boxes) for res in results]
+
+    def open_writer(self, dst, fps, w, h, audio_src=None):
+        """Frame writer for ``dst`` using the configured encoder."""
+        s = self.settings
+        return open_writer(dst, fps, w, h, s.encoder, s.codec, s.preset, s.crf, audio_src)
+
+    def process_live(self, source, dst, latency_ms=500, segment_s=60, realtime=None,
+                     should_stop=None, on_stats=None):
+        """Anonymize a camera / stream (or a file replayed in real time) as it plays.
+
+        ``source`` is a camera index ("0"), an rtsp:// / http:// URL or a file;
+        files are replayed at their frame rate unless ``realtime`` is False.
+        Output goes to ``dst`` cut into ``segment_s`` second files
+        (``name_00000.mp4``, ...; 0 = one file) or, with ``dst="-"``, as raw
+        bgr24 frames to stdout. See :func:`faceshield.live.process_live` for
+        the latency budget and drop rules. Returns the final :class:`LiveStats`.
+        """
+        from .live import is_stream, open_capture, probe_live, process_live
+
+        cap = open_capture(source)
+        try:
+            fps, w, h = probe_live(cap)
+            if dst == "-":
+                writer = PipeWriter(sys.stdout.buffer)
+            elif segment_s > 0:
+                writer = SegmentWriter(
+                    lambda i: self.open_writer(segment_path(dst, i), fps, w, h), round(segment_s * fps)
+                )
+            else:
+                writer = self.open_writer(dst, fps, w, h)
+            error = None
+            try:
+                return process_live(
+                    self, cap, writer, fps, w, h,
+                    budget_s=latency_ms / 1000.0,
+                    realtime=not is_stream(source) if realtime is None else realtime,
+                    should_stop=should_stop,
+                    on_stats=on_stats,
+                )
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                release_writer(writer, error)
+        finally:
+            cap.release()
+
+    def process_images(self, inputs, output_dir="", suffix="_blurred", overwrite=False,
+                       on_progress=None, should_stop=None, metrics=None):
+        """Blur all faces in still images: files, folders, glob patterns or archives.
+
+        See :func:`faceshield.images.expand_images` for the output paths and
+        :func:`faceshield.images.process_images` for batching and skipping of
+        up-to-date outputs. Returns the :class:`ImageStats`; the summary and the
+        first errors are kept in ``last_report``.
+        """
+        from .images import expand_images, process_images
+
+        items = expand_images(inputs, output_dir, suffix)
+        stats = process_images(
+            self, items, overwrite=overwrite, on_progress=on_progress,
+            should_stop=should_stop, metrics=metrics
+        )
+        self.last_report = "\n".join([stats.line()] + ["  " + e for e in stats.errors])
+        return stats
+
+    def detection_cache(self, src):
+        """:class:`DetectionCache` for ``src`` under the current settings."""
+        s = self.settings
+        params = {"iou": round(float(s.iou), 4), "imgsz": int(s.imgsz), "backend": s.backend}
+        if s.backend != "pytorch":
+            params["precision"] = s.precision
+        else:
+            # fp16 and fp32 inference return slightly different boxes and scores
+            params["half"] = self.half
+        if s.tiles > 1:
+            params.update(tiles=s.tiles, tile_overlap=s.tile_overlap, coarse_imgsz=s.coarse_imgsz)
+        return DetectionCache(src, s.model, params, cache_dir=s.cache_dir)
+
+    def process_video(self, src, dst, on_progress=None, on_frame=None, should_stop=None,
+                      start=0, end=None, metrics=None) -> bool:
+        """Blur all faces of ``src`` into ``dst``.
+
+        Decode, inference, blur and encode run as separate pipeline stages (see
+        :func:`run_pipeline`). Frames travel in groups of ``settings.batch``;
+        each group goes through the detector as a single batch and is written
+        back in its original order. With ``settings.interval`` > 1 only every
+        N-th frame is detected and a :class:`BoxTracker` fills in the rest.
+
+        With ``settings.cache`` the detections of a complete every-frame run
+        are written to a sidecar :class:`DetectionCache`; later runs with the
+        same video, model, iou and imgsz (and an equal or higher ``conf``)
+        read them back and skip inference entirely.
+
+        ``start`` / ``end`` restrict the run to that frame range (end exclusive);
+        with ``settings.workers`` > 1 the video is instead split into segments
+        processed in parallel worker processes (see :mod:`faceshield.segments`).
+        With ``settings.checkpoint_s`` the run is written in resumable chunks
+        (see :mod:`faceshield.checkpoint`).
+
+        ``metrics`` (a :class:`ProgressChannel`) receives per-stage frame counts
+        without blocking; GUIs poll it at their own rate. ``on_progress(p,
+        remaining)`` is the simpler per-frame alternative and receives the
+        completed fraction and the ETA in seconds (-1 when unknown).
+        ``on_frame(frame)`` sees every written frame and ``should_stop()`` is
+        polled by every stage. Both callbacks run on the encoder thread; frame
+        buffers are reused afterwards, so ``on_frame`` must copy what it keeps.
+        Returns ``False`` when the run was stopped early. The time from the call
+        to the first written frame is kept as ``first_frame_s``.
+
+        With ``settings.profile`` every stage is timed by a :class:`Profiler`
+        (kept as ``last_profile``); its summary table and Chrome trace are
+        written next to ``dst`` as ``.profile.txt`` / ``.profile.json``.
+        """
+        s = self.settings
+        self.last_profile = None
+        self.first_frame_s = None
+        t_call = time.perf_counter()
+        if s.checkpoint_s > 0 and start == 0 and end is None:
+            from .checkpoint import process_checkpointed
+            return process_checkpointed(
+                self, src, dst, on_progress=on_progress, on_frame=on_frame,
+                should_stop=should_stop, metrics=metrics
+            )
+        if s.workers > 1 and start == 0 and end is None:
+            from .segments import process_segmented
+            return process_segmented(
+                s, src, dst, on_progress=on_progress, should_stop=should_stop, metrics=metrics
+            )
+
+        fps, w, h, total_frames = probe_video(src)
+        if end is not None and (total_frames <= 0 or end < total_frames):
+            total_frames = end
+        if total_frames > 0:
+            total_frames = max(0, total_frames - start)
+
+        cap = cv2.VideoCapture(src)
+        if not cap.isOpened():
+            raise RuntimeError(f"Could not open input video: {src}")
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        try:
+            writer = self.open_writer(dst, fps, w, h, audio_src=src if start == 0 and end is None else None)
+        except Exception:
+            cap.release()
+            raise
+
+        anonymizer = Anonymizer(s.method, s.blur, s.shape)
+        batch = max(1, int(s.batch))
+        interval = max(1, int(s.interval))
+        cache = self.detection_cache(src) if s.cache else None
+        cached = cache.load(s.conf) if cache is not None else None
+        adaptive = (s.target_fps > 0 or s.deadline_s > 0) and cached is None
+        ctrl = SpeedController(s.target_fps, s.imgsz, w, h) if adaptive else None
+        tracker = BoxTracker(pad=s.track_pad) if interval > 1 or ctrl is not None else None
+        gate = MotionGate(w, h) if s.motion and cached is None else None
+        # Raw detections of this run, saved to the cache once it completes
+        whole = start == 0 and end is None
+        recordable = whole and cached is None and tracker is None and gate is None
+        record = [] if cache is not None and recordable else None
+        self.last_report = ""
+        prof = Profiler() if s.profile else None
+        self.profiler = self.last_profile = prof
+
+        def run_detector(frames, imgsz=None):
+            imgsz = imgsz or s.imgsz
+            if gate is None:
+                return self.detect(frames, imgsz)
+            return detect_gated(gate, frames, lambda f: self.detect_scored(f, imgsz), self._predict, imgsz)
+
+        maxsize = max(1, QUEUE_FRAMES // batch)
+        # Decoded frames are recycled once written: memory stays flat for any length
+        pool = FramePool(w, h, prealloc=4 * batch)
+
+        processed = 0
+        decoded = start  # absolute index of the next frame to reach inference
+        since_key = None  # adaptive mode: frames since the last keyframe
+        t0 = time.time()
+        if metrics is not None:
+            metrics.start(total_frames)
+
+        def decode():
+            batches = read_batches(cap, batch, None if end is None else end - start, pool)
+            while True:
+                t = time.perf_counter()
+                frames = next(batches, None)
+                if frames is None:
+                    return
+                if prof is not None:
+                    prof.record("decode", t, time.perf_counter() - t, len(frames))
+                if metrics is not None:
+                    metrics.add("decode", len(frames))
+                yield frames
+
+        def detect_boxes(frames):
+            nonlocal decoded
+            if cached is not None:
+                boxes = [cached[decoded + i] for i in range(len(frames))]
+                decoded += len(frames)
+                return boxes
+
+            if ctrl is not None:
+                return adaptive_boxes(frames)
+
+            if tracker is None:
+                decoded += len(frames)
+                if record is None:
+                    return run_detector(frames)
+                scored = self.detect_scored(frames)
+                record.extend(scored)
+                return [None if xyxy is None else xyxy.astype(int) for xyxy, _ in scored]
+
+            # Keyframes count from ``start`` so every segment begins with a detection
+            keys = [i for i in range(len(frames)) if (decoded + i - start) % interval == 0]
+            dets = dict(zip(keys, run_detector([frames[i] for i in keys])))
+            boxes = [
+                tracker.update(dets[i]) if i in dets else tracker.predict()
+                for i in range(len(frames))
+            ]
+            decoded += len(frames)
+            return boxes
+
+        def adaptive_boxes(frames):
+            nonlocal decoded, since_key
+            t = time.perf_counter()
+            if s.deadline_s > 0 and total_frames > 0:
+                ctrl.set_deadline(total_frames - (decoded - start), s.deadline_s - (time.time() - t0))
+
+            keys = []
+            for i in range(len(frames)):
+                if since_key is None or since_key + 1 >= ctrl.interval:
+                    keys.append(i)
+                    since_key = 0
+                else:
+                    since_key += 1
+
+            dets = {}
+            probe = None
+            if keys and ctrl.probe_due():
+                # Periodic full-size keyframe: small faces a reduced imgsz misses raise the floor
+                dets[keys[0]] = run_detector([frames[keys[0]]], s.imgsz)[0]
+                probe = [dets[keys[0]]]
+            rest = [i for i in keys if i not in dets]
+            dets.update(zip(rest, run_detector([frames[i] for i in rest], ctrl.imgsz)))
+            boxes = [
+                tracker.update(dets[i]) if i in dets else tracker.predict()
+                for i in range(len(frames))
+            ]
+            decoded += len(frames)
+            ctrl.observe(len(frames), time.perf_counter() - t, [dets[i] for i in rest], probe)
+            return boxes
+
+        def infer(frames):
+            with span_of(prof, "infer", len(frames)):
+                boxes = detect_boxes(frames)
+            if metrics is not None:
+                metrics.add("infer", len(frames))
+            return frames, boxes
+
+        def blur(item):
+            frames, boxes = item
+            with span_of(prof, "blur", len(frames)):
+                for frame, xyxy in zip(frames, boxes):
+                    anonymizer.apply(frame, xyxy)
+            if metrics is not None:
+                metrics.add("blur", len(frames))
+            return frames
+
+        def encode(frames):
+            nonlocal processed
+            for frame in frames:
+                with span_of(prof, "encode"):
+                    writer.write(frame)
+                processed += 1
+                if processed == 1:
+                    self.first_frame_s = time.perf_counter() - t_call
+                if metrics is not None:
+                    metrics.add("encode")
+
+                if on_progress is not None:
+                    # Update progress and ETA
+                    elapsed = time.time() - t0
+                    fps_proc = processed / elapsed if elapsed > 0 else 0.0
+
+                    if total_frames > 0:
+                        p = processed / total_frames
+                        remaining = (total_frames - processed) / fps_proc if fps_proc > 0 else -1
+                    else:
+                        p = 0.0
+                        remaining = -1
+                    on_progress(p, remaining)
+
+                if on_frame is not None:
+                    on_frame(frame)
+                pool.release(frame)
+
+        error = None
+        try:
+            completed = run_pipeline(
+                decode(),
+                [infer, blur],
+                encode,
+                should_stop=should_stop,
+                maxsize=maxsize
+            )
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            cap.release()
+            with span_of(prof, "encode.flush", 0):
+                release_writer(writer, error)
+            self.profiler = None
+
+        notes = []
+        if self.first_frame_s is not None:
+            notes.append(f"first frame written after {self.first_frame_s:.2f}s")
+        if ctrl is not None:
+            notes.append(ctrl.summary())
+            if len(ctrl.log) > ADAPTIVE_LOG_LINES:
+                notes.append(f"  ... {len(ctrl.log) - ADAPTIVE_LOG_LINES} earlier change(s)")
+            notes.extend("  " + line for line in ctrl.log[-ADAPTIVE_LOG_LINES:])
+        if gate is not None:
+            notes.append(gate.summary())
+        if prof is not None:
+            prof.counters["frame_pool_mb"] = round(pool.nbytes / 2**20, 1)
+            prof.finish()
+            try:
+                txt, _ = prof.save(os.path.splitext(dst)[0])
+                notes.append(f"profile: {txt}")
+            except OSError:
+                pass
+        self.last_report = "\n".join(notes)
+
+        if completed and record:
+            try:
+                cache.save(s.conf, record)
+            except OSError:
+                # Read-only source folder etc.: the cache is only an optimization
+                pass
+        return completed
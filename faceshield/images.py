@@ -0,0 +1,464 @@
+import glob
+import os
+import struct
+import tarfile
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import cv2
+import numpy as np
+
+from .anonymize import Anonymizer
+from .pipeline import run_pipeline
+from .progress import STAGES
+from .utils import fmt_time
+
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+ARCHIVE_EXTS = (".zip", ".tar", ".tar.gz", ".tgz")
+JPEG_EXTS = (".jpg", ".jpeg")
+
+# Re-encoding quality (the source quality is not recorded in the file)
+ENCODE_PARAMS = {
+    ".jpg": [cv2.IMWRITE_JPEG_QUALITY, 95],
+    ".jpeg": [cv2.IMWRITE_JPEG_QUALITY, 95],
+    ".webp": [cv2.IMWRITE_WEBP_QUALITY, 90],
+    ".png": [cv2.IMWRITE_PNG_COMPRESSION, 3],
+}
+
+# Images decoded ahead (and written behind) per worker thread; bounds memory
+WINDOW_PER_THREAD = 2
+# Errors listed in the report (the rest are only counted)
+MAX_ERRORS = 10
+
+_EXIF_ORIENTATION = 0x0112
+
+
+@dataclass
+class ImageItem:
+    """One input image: a file, or ``member`` of the archive at ``path``."""
+
+    path: str
+    dst: str
+    member: str = ""
+
+    @property
+    def name(self):
+        return f"{self.path}:{self.member}" if self.member else self.path
+
+    @property
+    def ext(self):
+        return os.path.splitext(self.member or self.path)[1].lower()
+
+
+def _archive_stem(path):
+    name = path[:-len(".tar.gz")] if path.lower().endswith(".tar.gz") else os.path.splitext(path)[0]
+    return name.rstrip("/\\")
+
+
+def _safe_member(name):
+    # Archive entries with absolute paths or ".." must not write outside the output folder
+    parts = name.replace("\\", "/").split("/")
+    return not name.startswith(("/", "\\")) and ".." not in parts and ":" not in parts[0]
+
+
+def _archive_members(path):
+    if path.lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as z:
+            return sorted(i.filename for i in z.infolist() if not i.is_dir())
+    with tarfile.open(path) as t:
+        # Archive order: members are then read front to back (cheap for compressed tars)
+        return [m.name for m in t.getmembers() if m.isfile()]
+
+
+def expand_images(patterns, output_dir="", suffix="_blurred"):
+    """Resolve image files, folders (recursively), glob patterns and archives.
+
+    Returns :class:`ImageItem` s with their output paths: images of a folder
+    or archive keep their relative paths under ``<folder>_blurred/`` (or
+    ``output_dir``); single files become ``<name>_blurred.<ext>`` next to the
+    input (or in ``output_dir``). Outputs of earlier runs (``suffix`` names)
+    are never picked up as inputs.
+    """
+    items = []
+
+    def is_output(name):
+        return bool(suffix) and os.path.splitext(name)[0].endswith(suffix)
+
+    def add_file(fp):
+        stem, ext = os.path.splitext(os.path.basename(fp))
+        if is_output(fp):
+            return
+        folder = output_dir or os.path.dirname(os.path.abspath(fp))
+        items.append(ImageItem(fp, os.path.join(folder, f"{stem}{suffix}{ext}")))
+
+    def add_dir(root):
+        root = os.path.abspath(root)
+        out_root = os.path.abspath(output_dir or root.rstrip("/\\") + suffix)
+        for folder, dirs, files in os.walk(root):
+            dirs[:] = sorted(d for d in dirs if os.path.join(folder, d) != out_root)
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTS) and not is_output(name):
+                    fp = os.path.join(folder, name)
+                    items.append(ImageItem(fp, os.path.join(out_root, os.path.relpath(fp, root))))
+
+    def add_archive(fp):
+        out_root = output_dir or _archive_stem(os.path.abspath(fp)) + suffix
+        for member in _archive_members(fp):
+            if member.lower().endswith(IMAGE_EXTS) and _safe_member(member):
+                items.append(ImageItem(fp, os.path.join(out_root, *member.split("/")), member))
+
+    def add(fp):
+        if os.path.isdir(fp):
+            add_dir(fp)
+        elif fp.lower().endswith(ARCHIVE_EXTS):
+            add_archive(fp)
+        elif fp.lower().endswith(IMAGE_EXTS):
+            add_file(fp)
+
+    for pat in patterns:
+        if os.path.exists(pat):
+            add(pat)
+        else:
+            for fp in sorted(glob.glob(pat, recursive=True)):
+                if os.path.isfile(fp):
+                    add(fp)
+
+    # De-duplicate while keeping order
+    seen = set()
+    out = []
+    for it in items:
+        key = (os.path.abspath(it.path), it.member)
+        if key not in seen:
+            seen.add(key)
+            out.append(it)
+    return out
+
+
+def is_image_input(path) -> bool:
+    """True for folders, image files and archives (the image mode's inputs)."""
+    return os.path.isdir(path) or str(path).lower().endswith(IMAGE_EXTS + ARCHIVE_EXTS)
+
+
+def up_to_date(item) -> bool:
+    """The output exists and is newer than its source: nothing to do."""
+    try:
+        return os.path.getmtime(item.dst) >= os.path.getmtime(item.path)
+    except OSError:
+        return False
+
+
+def exif_orientation(data) -> int:
+    """EXIF orientation (1-8) of JPEG bytes; 1 when there is none."""
+    if data[:2] != b"\xff\xd8":
+        return 1
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        if marker == 0xDA:  # image data follows: no more metadata
+            break
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b"Exif\x00\x00":
+            return _tiff_orientation(data[pos + 10:pos + 2 + length])
+        pos += 2 + length
+    return 1
+
+
+def _tiff_orientation(tiff):
+    try:
+        order = "<" if tiff[:2] == b"II" else ">"
+        (ifd,) = struct.unpack(order + "I", tiff[4:8])
+        (count,) = struct.unpack(order + "H", tiff[ifd:ifd + 2])
+        for i in range(count):
+            entry = tiff[ifd + 2 + 12 * i:ifd + 14 + 12 * i]
+            tag, _type, _n, value = struct.unpack(order + "HHIH", entry[:10])
+            if tag == _EXIF_ORIENTATION:
+                return value if 1 <= value <= 8 else 1
+    except struct.error:
+        pass
+    return 1
+
+
+def with_orientation(jpeg, orientation) -> bytes:
+    """Insert an EXIF block holding only ``orientation`` into encoded JPEG bytes.
+
+    Other metadata of the source is deliberately not carried over: EXIF may
+    hold GPS positions and an unblurred thumbnail.
+    """
+    tiff = b"MM\x00\x2a" + struct.pack(">IH", 8, 1)
+    tiff += struct.pack(">HHIHH", _EXIF_ORIENTATION, 3, 1, int(orientation), 0) + struct.pack(">I", 0)
+    payload = b"Exif\x00\x00" + tiff
+    app1 = b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+    pos = 2
+    if jpeg[2:4] == b"\xff\xe0":  # keep the JFIF header first
+        pos += 2 + struct.unpack(">H", jpeg[4:6])[0]
+    return bytes(jpeg[:pos]) + app1 + bytes(jpeg[pos:])
+
+
+def orient(img, orientation, inverse=False):
+    """Apply EXIF ``orientation`` (stored -> upright), or undo it with ``inverse``."""
+    if orientation == 2:
+        return cv2.flip(img, 1)
+    if orientation == 3:
+        return cv2.rotate(img, cv2.ROTATE_180)
+    if orientation == 4:
+        return cv2.flip(img, 0)
+    if orientation == 5:
+        return cv2.transpose(img)
+    if orientation == 7:
+        return cv2.flip(cv2.transpose(img), -1)
+    if orientation in (6, 8):
+        clockwise = (orientation == 6) != inverse
+        return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE if clockwise else cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return img
+
+
+@dataclass
+class _Loaded:
+    item: ImageItem
+    image: np.ndarray = None  # upright, as stored (gray, BGR or BGRA; 8 or 16 bit)
+    view: np.ndarray = None  # upright 8-bit BGR for the detector (``image`` itself when that already)
+    orientation: int = 1
+    error: str = ""
+
+
+@dataclass
+class ImageStats:
+    total: int = 0
+    written: int = 0
+    skipped: int = 0
+    failed: int = 0
+    stopped: bool = False
+    seconds: float = 0.0
+    errors: list = field(default_factory=list)
+
+    def line(self) -> str:
+        done = self.written + self.failed
+        per = f" ({1000.0 * self.seconds / done:.1f} ms/image)" if done else ""
+        text = (
+            f"images: {self.written} written, {self.skipped} skipped (up to date), "
+            f"{self.failed} failed in {fmt_time(self.seconds)}{per}"
+        )
+        return text + ("; stopped early" if self.stopped else "")
+
+
+def _decode(item, data):
+    loaded = _Loaded(item)
+    try:
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+        if img is None:
+            raise ValueError("not a readable image")
+        # IMREAD_UNCHANGED leaves the pixels as stored; faces are searched upright
+        loaded.orientation = exif_orientation(data) if item.ext in JPEG_EXTS else 1
+        img = orient(img, loaded.orientation)
+        # The detector sees 8 bit; the image keeps its depth and is blurred as it is
+        view = img if img.dtype == np.uint8 else cv2.convertScaleAbs(img, alpha=255.0 / 65535.0)
+        if view.ndim == 2:
+            loaded.view = cv2.cvtColor(view, cv2.COLOR_GRAY2BGR)
+        elif view.shape[2] == 4:
+            loaded.view = cv2.cvtColor(view, cv2.COLOR_BGRA2BGR)
+        else:
+            loaded.view = view
+        loaded.image = img
+    except Exception as e:
+        loaded.error = str(e) or type(e).__name__
+    return loaded
+
+
+def _write(loaded, boxes, anonymizer):
+    img = loaded.image
+    if img.ndim == 2 or img is loaded.view:
+        anonymizer.apply(img, boxes)
+    elif img.shape[2] == 4:
+        # Alpha stays as it is
+        color = img[:, :, :3].copy() if img.dtype != np.uint8 else loaded.view
+        anonymizer.apply(color, boxes)
+        img[:, :, :3] = color
+    else:
+        anonymizer.apply(img, boxes)
+
+    item = loaded.item
+    ok, buf = cv2.imencode(item.ext, orient(img, loaded.orientation, inverse=True), ENCODE_PARAMS.get(item.ext, []))
+    if not ok:
+        raise RuntimeError("encoding failed")
+    data = buf.tobytes()
+    if loaded.orientation != 1:
+        data = with_orientation(data, loaded.orientation)
+
+    os.makedirs(os.path.dirname(os.path.abspath(item.dst)), exist_ok=True)
+    # Written under a temporary name: an interrupted run never leaves a truncated file to skip
+    tmp = f"{item.dst}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, item.dst)
+
+
+class _Archives:
+    """Open archives of one run; read only from the decode thread, members in order."""
+
+    def __init__(self):
+        self.open = {}
+
+    def read(self, item):
+        """Bytes of ``item``'s member, or the exception that prevented reading it."""
+        try:
+            return self._read(item)
+        except (OSError, KeyError, zipfile.BadZipFile, tarfile.TarError) as e:
+            return e
+
+    def _read(self, item):
+        arc = self.open.get(item.path)
+        if arc is None:
+            is_zip = item.path.lower().endswith(".zip")
+            arc = self.open[item.path] = zipfile.ZipFile(item.path) if is_zip else tarfile.open(item.path)
+        if isinstance(arc, zipfile.ZipFile):
+            return arc.read(item.member)
+        return arc.extractfile(item.member).read()
+
+    def close(self):
+        for arc in self.open.values():
+            arc.close()
+        self.open.clear()
+
+
+def _read_file(item):
+    with open(item.path, "rb") as f:
+        return f.read()
+
+
+def process_images(engine, items, overwrite=False, on_progress=None, should_stop=None,
+                   metrics=None, threads=0) -> ImageStats:
+    """Anonymize ``items`` (see :func:`expand_images`) with ``engine``'s model.
+
+    Reading and decoding, and blurring, encoding and writing run on a pool of
+    ``threads`` threads (default: one per CPU); the detector sees batches of
+    up to ``settings.batch`` images of the same size, gathered from a window
+    of decoded images. Images are written in their own format with their EXIF
+    orientation; an item whose output is newer than its source is skipped
+    unless ``overwrite`` is set, so reruns only process new or changed images.
+    Unreadable images are counted as failed and do not stop the run.
+    ``on_progress``, ``should_stop`` and ``metrics`` behave as in
+    :meth:`Engine.process_video`.
+    """
+    s = engine.settings
+    stats = ImageStats(total=len(items))
+    t0 = time.time()
+    todo = items if overwrite else [it for it in items if not up_to_date(it)]
+    stats.skipped = len(items) - len(todo)
+
+    batch = max(1, int(s.batch))
+    threads = max(1, int(threads or os.cpu_count() or 1))
+    window = max(2 * batch, WINDOW_PER_THREAD * threads)
+    local = threading.local()
+    lock = threading.Lock()
+    archives = _Archives()
+    if metrics is not None:
+        metrics.start(len(todo))
+
+    def fail(loaded, error):
+        # Called from the decode and the write thread
+        with lock:
+            stats.failed += 1
+            if len(stats.errors) < MAX_ERRORS:
+                stats.errors.append(f"{loaded.item.name}: {error}")
+
+    def report():
+        if on_progress is not None:
+            done = stats.written + stats.failed
+            elapsed = time.time() - t0
+            rate = done / elapsed if elapsed > 0 else 0.0
+            remaining = (len(todo) - done) / rate if rate > 0 else -1
+            on_progress(done / max(1, len(todo)), remaining)
+
+    def load(item, data=None):
+        try:
+            if data is None:
+                data = _read_file(item)
+        except OSError as e:
+            data = e
+        if isinstance(data, Exception):
+            return _Loaded(item, error=str(data) or type(data).__name__)
+        return _decode(item, data)
+
+    def finish(loaded, boxes):
+        anonymizer = getattr(local, "anonymizer", None)
+        if anonymizer is None:
+            anonymizer = local.anonymizer = Anonymizer(s.method, s.blur, s.shape)
+        _write(loaded, boxes, anonymizer)
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="images") as pool:
+        def decode():
+            # Same-size images wait here until they fill a batch; past ``window``
+            # waiting images the oldest group goes out partly filled
+            groups = {}
+            held = 0
+            for i in range(0, len(todo), window):
+                chunk = todo[i:i + window]
+                # Archive members are read here, in order; files are read by the pool
+                data = [archives.read(it) if it.member else None for it in chunk]
+                for loaded in pool.map(load, chunk, data):
+                    if loaded.error:
+                        fail(loaded, loaded.error)
+                        # Finished for every stage, so the progress still reaches the end
+                        if metrics is not None:
+                            for stage in STAGES:
+                                metrics.add(stage)
+                        report()
+                        continue
+                    if metrics is not None:
+                        metrics.add("decode")
+                    group = groups.setdefault(loaded.view.shape, [])
+                    group.append(loaded)
+                    held += 1
+                    if len(group) == batch:
+                        held -= batch
+                        yield groups.pop(loaded.view.shape)
+                    while held > window:
+                        oldest = groups.pop(next(iter(groups)))
+                        held -= len(oldest)
+                        yield oldest
+            yield from groups.values()
+
+        def infer(group):
+            boxes = engine.detect([loaded.view for loaded in group])
+            if metrics is not None:
+                metrics.add("infer", len(group))
+            return group, boxes
+
+        pending = deque()
+
+        def collect(limit):
+            # Finished writes are counted in order; waits while more than ``limit`` are in flight
+            while pending and (len(pending) > limit or pending[0][1].done()):
+                loaded, future = pending.popleft()
+                try:
+                    future.result()
+                    with lock:
+                        stats.written += 1
+                except Exception as e:
+                    fail(loaded, e)
+                if metrics is not None:
+                    metrics.add("blur")
+                    metrics.add("encode")
+                report()
+
+        def write(item):
+            group, boxes = item
+            for loaded, xyxy in zip(group, boxes):
+                pending.append((loaded, pool.submit(finish, loaded, xyxy)))
+            collect(window)
+
+        try:
+            completed = run_pipeline(decode(), [infer], write, should_stop=should_stop)
+        finally:
+            archives.close()
+        # Everything already handed to the pool is finished, also after a stop
+        collect(0)
+
+    stats.stopped = not completed
+    stats.seconds = time.time() - t0
+    return stats
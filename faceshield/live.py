@@ -0,0 +1,280 @@
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from .anonymize import Anonymizer
+from .buffers import FramePool
+from .tracker import BoxTracker
+
+# How often blocked waits wake up to check for a stop request
+POLL_S = 0.1
+# Smoothing of the per-frame cost estimates
+EMA = 0.2
+
+
+def is_stream(source) -> bool:
+    """True for camera indices and URLs (rtsp://, http://, ...), False for files."""
+    return str(source).isdigit() or "://" in str(source)
+
+
+def open_capture(source):
+    """``cv2.VideoCapture`` for a camera index ("0"), a stream URL or a file."""
+    cap = cv2.VideoCapture(int(source)) if str(source).isdigit() else cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open live source: {source}")
+    # Keep the driver-side queue short; buffering happens (and is dropped) here
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+def probe_live(cap, default_fps=25.0):
+    """``(fps, w, h)`` of an open capture; streams often report no fps or size."""
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if not fps or fps <= 0 or fps > 240:
+        fps = default_fps
+    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    if w <= 0 or h <= 0:
+        ok, frame = cap.read()
+        if not ok:
+            raise RuntimeError("The live source delivered no frames.")
+        h, w = frame.shape[:2]
+    return fps, w, h
+
+
+class LiveStats:
+    """Counters of a live run; latencies are kept for the last ``window`` frames."""
+
+    def __init__(self, window=300):
+        self.t0 = time.monotonic()
+        self.captured = 0
+        self.emitted = 0
+        self.dropped = 0  # frames never emitted: stale or skipped to catch up
+        self.overflow = 0  # pushed out of the capture buffer (capture thread only)
+        self.held = 0  # output slots filled by repeating the last blurred frame
+        self.tracked = 0  # emitted with tracked boxes, detection skipped
+        self.late = 0  # emitted although older than the budget
+        self.latencies = deque(maxlen=window)
+
+    def snapshot(self) -> dict:
+        lat = np.array(self.latencies, dtype=np.float64) * 1000.0
+        elapsed = max(1e-6, time.monotonic() - self.t0)
+        return {
+            "captured": self.captured,
+            "emitted": self.emitted,
+            "dropped": self.dropped + self.overflow,
+            "held": self.held,
+            "tracked": self.tracked,
+            "late": self.late,
+            "fps": self.emitted / elapsed,
+            "latency_p50_ms": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+            "latency_p95_ms": float(np.percentile(lat, 95)) if len(lat) else 0.0,
+            "latency_max_ms": float(lat.max()) if len(lat) else 0.0,
+        }
+
+    def line(self) -> str:
+        st = self.snapshot()
+        drop_pct = 100.0 * st["dropped"] / max(1, st["captured"])
+        return (
+            f"in {st['captured']}  out {st['emitted']} ({st['fps']:.1f} fps)  "
+            f"dropped {st['dropped']} ({drop_pct:.1f}%)  tracked {st['tracked']}  "
+            f"latency p50 {st['latency_p50_ms']:.0f} / p95 {st['latency_p95_ms']:.0f} / "
+            f"max {st['latency_max_ms']:.0f} ms"
+        )
+
+
+class _Capture:
+    """Reads frames on its own thread and keeps only the newest ``keep`` of them.
+
+    Real streams are read as fast as they deliver; files are replayed at their
+    own frame rate when ``realtime`` is set. Frames pushed out of the buffer
+    before processing are counted as dropped.
+    """
+
+    def __init__(self, cap, fps, pool, stats, keep, realtime):
+        self.cap = cap
+        self.fps = fps
+        self.pool = pool
+        self.stats = stats
+        self.realtime = realtime
+        self.frames = deque()
+        self.keep = max(1, int(keep))
+        self.cond = threading.Condition()
+        self.ended = False
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        self.thread.join(timeout=2.0)
+
+    def _run(self):
+        t_start = time.monotonic()
+        index = 0
+        try:
+            while not self.stopped:
+                if self.realtime:
+                    delay = t_start + index / self.fps - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                buf = self.pool.acquire()
+                ok, frame = self.cap.read(buf)
+                if not ok:
+                    self.pool.release(buf)
+                    break
+                with self.cond:
+                    self.frames.append((index, time.monotonic(), frame))
+                    self.stats.captured += 1
+                    while len(self.frames) > self.keep:
+                        _, _, old = self.frames.popleft()
+                        self.pool.release(old)
+                        self.stats.overflow += 1
+                    self.cond.notify()
+                index += 1
+        finally:
+            with self.cond:
+                self.ended = True
+                self.cond.notify_all()
+
+    def pending(self):
+        return len(self.frames)
+
+    def get(self, newest=False):
+        """Next ``(index, t_captured, frame)``, or ``None`` at the end / on stop.
+
+        With ``newest`` everything but the latest frame is dropped first.
+        """
+        with self.cond:
+            while not self.frames and not self.ended and not self.stopped:
+                self.cond.wait(POLL_S)
+            if not self.frames:
+                return None
+            if newest:
+                while len(self.frames) > 1:
+                    _, _, old = self.frames.popleft()
+                    self.pool.release(old)
+                    self.stats.dropped += 1
+            return self.frames.popleft()
+
+
+def process_live(engine, cap, writer, fps, w, h, budget_s=0.5, max_track=5, realtime=False,
+                 should_stop=None, on_stats=None, stats_every_s=1.0, hold=True) -> LiveStats:
+    """Anonymize the live capture ``cap`` into ``writer`` within a latency budget.
+
+    Every captured frame is either detected, blurred with tracked boxes
+    (detection skipped, at most ``max_track`` frames after a detection) or
+    dropped; a frame is never written without going through one of the first
+    two. Frames already older than ``budget_s`` when their turn comes are
+    dropped, and detection is skipped while newer frames are waiting or when
+    the expected detector time would push the frame past the budget. With ``hold`` each dropped frame's output
+    slot repeats the last written (blurred) frame, so file output keeps
+    real-time length. ``on_stats(stats)`` is called every ``stats_every_s``.
+    """
+    s = engine.settings
+    pool = FramePool(w, h)
+    stats = LiveStats()
+    keep = max(2, int(round(budget_s * fps)) + 1)
+    capture = _Capture(cap, fps, pool, stats, keep, realtime)
+    anonymizer = Anonymizer(s.method, s.blur, s.shape)
+    tracker = BoxTracker(pad=s.track_pad)
+
+    det_cost = 0.0  # expected detector seconds per frame
+    work_cost = 0.0  # expected blur + write seconds per frame
+    since_det = None  # frames since the last detection (None: no usable track)
+    last_index = -1
+    last_out = np.zeros((h, w, 3), dtype=np.uint8)
+    have_out = False
+    next_stats = time.monotonic() + stats_every_s
+
+    def emit_held(n):
+        if hold and have_out and n > 0:
+            for _ in range(n):
+                writer.write(last_out)
+            stats.held += n
+
+    capture.start()
+    try:
+        while True:
+            if should_stop is not None and should_stop():
+                break
+            # Without a usable track the next frame needs the detector: make it the newest one
+            can_track = since_det is not None and since_det < max_track
+            item = capture.get(newest=not can_track)
+            if item is None:
+                break
+            index, t_cap, frame = item
+
+            # Frames dropped in capture still advance the tracker and the timeline
+            gap = index - last_index - 1
+            last_index = index
+            for _ in range(gap):
+                tracker.predict()
+            if since_det is not None:
+                since_det += gap
+            emit_held(gap)
+
+            age = time.monotonic() - t_cap
+            can_track = since_det is not None and since_det < max_track
+            if age > budget_s and have_out:
+                # Stale: the budget is already blown, drop rather than fall further behind
+                tracker.predict()
+                if since_det is not None:
+                    since_det += 1
+                stats.dropped += 1
+                emit_held(1)
+                pool.release(frame)
+                continue
+
+            # Detect when it fits the budget without building a backlog; track otherwise
+            fits = age + det_cost + work_cost <= budget_s and capture.pending() == 0
+            if fits or not can_track:
+                t = time.monotonic()
+                boxes = tracker.update(engine.detect([frame])[0])
+                det_cost += EMA * ((time.monotonic() - t) - det_cost)
+                since_det = 0
+            else:
+                boxes = tracker.predict()
+                since_det += 1
+                stats.tracked += 1
+
+            t = time.monotonic()
+            anonymizer.apply(frame, boxes)
+            writer.write(frame)
+            np.copyto(last_out, frame)
+            have_out = True
+            work_cost += EMA * ((time.monotonic() - t) - work_cost)
+
+            latency = time.monotonic() - t_cap
+            stats.latencies.append(latency)
+            stats.emitted += 1
+            if latency > budget_s:
+                stats.late += 1
+            pool.release(frame)
+
+            if on_stats is not None and time.monotonic() >= next_stats:
+                next_stats = time.monotonic() + stats_every_s
+                on_stats(stats)
+    finally:
+        capture.stop()
+    if on_stats is not None:
+        on_stats(stats)
+    return stats
+
+
+def live_output_name(source) -> str:
+    """Default output file for a live source (segments get numbered suffixes)."""
+    if str(source).isdigit():
+        return f"camera{source}_blurred.mp4"
+    if os.path.isfile(str(source)):
+        return os.path.splitext(os.path.basename(source))[0] + "_live.mp4"
+    return "stream_blurred.mp4"
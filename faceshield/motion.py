@@ -0,0 +1,216 @@
+import math
+
+import cv2
+import numpy as np
+
+from .anonymize import merge_boxes
+
+
+class MotionGate:
+    """Decides per frame whether the face detector has to run, and where.
+
+    Frames are compared with the last frame that went through the detector on
+    a small, blurred grayscale copy (``small_w`` pixels wide). Only a frame
+    without any changed pixel is skipped: the previous boxes are reused.
+    Otherwise the changed pixels are grouped into connected areas and only
+    those (padded, together with every face box they touch) are detected, so
+    however small a newly appearing face is, it is detected on its first
+    frame. Large changes, the first frame and every ``refresh``-th frame get a
+    full detection, so a person standing still when the gate started, or
+    missed once, is picked up again.
+
+    Reused boxes grow by ``drift`` of their size per frame since they were
+    detected, like :class:`BoxTracker` pads tracked boxes, so a face moving
+    too little to register still stays inside its blurred area.
+    """
+
+    def __init__(self, w, h, small_w=160, pixel_thresh=18, full_thresh=0.35, pad=0.25, min_pad=48, refresh=10, drift=0.1):
+        self.w, self.h = int(w), int(h)
+        self.small_size = (int(small_w), max(1, int(round(small_w * h / w))))
+        self.scale = self.w / self.small_size[0]
+        self.pixel_thresh = int(pixel_thresh)
+        self.full_thresh = float(full_thresh)
+        self.pad = float(pad)
+        self.min_pad = int(min_pad)
+        self.refresh = int(refresh)
+        self.drift = float(drift)
+
+        self.ref = None
+        self.since_full = 0
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.ages = np.zeros((0,), dtype=np.int32)  # frames since each box was detected
+        self.kernel = np.ones((3, 3), dtype=np.uint8)
+        self.stats = {
+            "frames": 0, "skipped": 0, "regional": 0, "full": 0,
+            "pixels": 0, "pixels_detected": 0,
+        }
+
+    def decide(self, frame):
+        """Return ``("full", None)``, ``("skip", None)`` or ``("regions", areas)``.
+
+        ``areas`` are the changed areas in frame pixels; :meth:`crops` turns
+        them into detector crops.
+        """
+        small = cv2.resize(frame, self.small_size, interpolation=cv2.INTER_AREA)
+        small = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        self.stats["frames"] += 1
+        self.stats["pixels"] += self.w * self.h
+
+        if self.ref is None or self.since_full >= self.refresh:
+            return self._full(small)
+
+        changed = cv2.absdiff(small, self.ref) > self.pixel_thresh
+        frac = float(changed.mean())
+        if frac == 0.0:
+            self.since_full += 1
+            self.stats["skipped"] += 1
+            return "skip", None
+        if frac > self.full_thresh:
+            return self._full(small)
+
+        mask = cv2.dilate(changed.astype(np.uint8), self.kernel, iterations=2)
+        _, _, comp, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        comp = comp[1:, :4].astype(np.float64) * self.scale
+        areas = np.concatenate([comp[:, :2], comp[:, :2] + comp[:, 2:]], axis=1)
+        self.ref = small
+        self.since_full += 1
+        return "regions", areas
+
+    def crops(self, areas):
+        """Crop rects for the changed ``areas`` of a "regions" decision.
+
+        Every area is grown to the face boxes it touches (the whole face, not
+        just the edge that moved) and padded; overlapping rects are merged.
+        Called in frame order, after the previous frame was resolved, so new
+        faces of the same batch are included. Returns ``None`` when the crops
+        would cover so much of the frame that a full detection is cheaper.
+        """
+        near = self._near_boxes(areas)
+        padded = self._padded()
+        rects = []
+        for (x1, y1, x2, y2), hits in zip(areas, near):
+            if hits.any():
+                x1, y1 = min(x1, padded[hits, 0].min()), min(y1, padded[hits, 1].min())
+                x2, y2 = max(x2, padded[hits, 2].max()), max(y2, padded[hits, 3].max())
+            px = max(self.min_pad, self.pad * (x2 - x1))
+            py = max(self.min_pad, self.pad * (y2 - y1))
+            rects.append([
+                max(0, int(x1 - px)), max(0, int(y1 - py)),
+                min(self.w, int(math.ceil(x2 + px))), min(self.h, int(math.ceil(y2 + py)))
+            ])
+        rects = [r for r, _ in merge_boxes(np.array(rects, dtype=np.int64))]
+
+        area = sum((r[2] - r[0]) * (r[3] - r[1]) for r in rects)
+        if area > self.full_thresh * self.w * self.h:
+            self.since_full = 0
+            self.stats["full"] += 1
+            self.stats["pixels_detected"] += self.w * self.h
+            return None
+        self.stats["regional"] += 1
+        self.stats["pixels_detected"] += area
+        return rects
+
+    def _near_boxes(self, areas):
+        """Areas x boxes (frame pixels): does the area overlap or touch the padded box."""
+        if len(self.boxes) == 0 or len(areas) == 0:
+            return np.zeros((len(areas), len(self.boxes)), dtype=bool)
+        b = self._padded()
+        # One thumbnail pixel of tolerance: touching counts
+        t = self.scale
+        return ((areas[:, 0, None] <= b[None, :, 2] + t) & (b[None, :, 0] - t <= areas[:, 2, None]) &
+                (areas[:, 1, None] <= b[None, :, 3] + t) & (b[None, :, 1] - t <= areas[:, 3, None]))
+
+    def _padded(self):
+        bw = self.boxes[:, 2] - self.boxes[:, 0]
+        bh = self.boxes[:, 3] - self.boxes[:, 1]
+        mx = self.drift * self.ages * bw
+        my = self.drift * self.ages * bh
+        return self.boxes + np.stack([-mx, -my, mx, my], axis=1)
+
+    def _full(self, small):
+        self.ref = small
+        self.since_full = 0
+        self.stats["full"] += 1
+        self.stats["pixels_detected"] += self.w * self.h
+        return "full", None
+
+    def resolve(self, kind, xyxy=None, rects=None):
+        """Update the current boxes from a decision and its detections.
+
+        Returns the boxes to blur: detected ones as they are, reused ones
+        padded for the drift since their detection.
+        """
+        new = np.zeros((0, 4), dtype=np.float32) if xyxy is None else xyxy.astype(np.float32).reshape(-1, 4)
+        if kind == "full":
+            self.boxes = new
+            self.ages = np.zeros(len(new), dtype=np.int32)
+        elif kind == "regions":
+            keep = np.ones(len(self.boxes), dtype=bool)
+            if len(self.boxes):
+                cx = (self.boxes[:, 0] + self.boxes[:, 2]) / 2
+                cy = (self.boxes[:, 1] + self.boxes[:, 3]) / 2
+                for x1, y1, x2, y2 in rects:
+                    keep &= ~((cx >= x1) & (cx < x2) & (cy >= y1) & (cy < y2))
+            self.boxes = np.concatenate([self.boxes[keep], new])
+            self.ages = np.concatenate([self.ages[keep] + 1, np.zeros(len(new), dtype=np.int32)])
+        else:
+            self.ages = self.ages + 1
+        if len(self.boxes) == 0:
+            return None
+        out = self._padded()
+        return np.concatenate([np.floor(out[:, :2]), np.ceil(out[:, 2:])], axis=1).astype(int)
+
+    def summary(self) -> str:
+        st = self.stats
+        frames = max(1, st["frames"])
+        pixels = max(1, st["pixels"])
+        return (
+            f"motion gate: {st['skipped']}/{st['frames']} frames skipped "
+            f"({100.0 * st['skipped'] / frames:.1f}%), {st['regional']} regional, {st['full']} full; "
+            f"{100.0 * (1 - st['pixels_detected'] / pixels):.1f}% of pixels skipped"
+        )
+
+
+def region_imgsz(imgsz, rect, w, h, floor=160):
+    """Inference size for a crop, scaled like the full frame would be (multiple of 32)."""
+    x1, y1, x2, y2 = rect
+    scaled = imgsz * max(x2 - x1, y2 - y1) / max(w, h)
+    return int(min(imgsz, max(floor, 32 * math.ceil(scaled / 32))))
+
+
+def detect_gated(gate, frames, detect_full, predict, imgsz):
+    """Detect faces on ``frames`` through ``gate``; returns integer boxes per frame.
+
+    ``detect_full(frames)`` handles full detections (one batch) and
+    ``predict(images, imgsz)`` the motion crops of one frame, grouped by
+    inference size.
+    """
+    decisions = [gate.decide(f) for f in frames]
+
+    full_idx = [i for i, (kind, _) in enumerate(decisions) if kind == "full"]
+    full = dict(zip(full_idx, detect_full([frames[i] for i in full_idx]))) if full_idx else {}
+
+    out = []
+    for i, (kind, areas) in enumerate(decisions):
+        if kind == "regions":
+            # Crops depend on the boxes of the frames before: made one frame at a time
+            rects = gate.crops(areas)
+            if rects is None:
+                kind = "full"
+                full[i] = detect_full([frames[i]])[0]
+        if kind == "full":
+            out.append(gate.resolve("full", full[i][0]))
+        elif kind == "regions":
+            groups = {}
+            for r in rects:
+                groups.setdefault(region_imgsz(imgsz, r, gate.w, gate.h), []).append(r)
+            dets = []
+            for size, items in groups.items():
+                crops = [frames[i][r[1]:r[3], r[0]:r[2]] for r in items]
+                for r, (xyxy, _) in zip(items, predict(crops, size)):
+                    if xyxy is not None and len(xyxy):
+                        dets.append(xyxy + np.array([r[0], r[1], r[0], r[1]], dtype=xyxy.dtype))
+            out.append(gate.resolve("regions", np.concatenate(dets) if dets else None, rects))
+        else:
+            out.append(gate.resolve("skip"))
+    return out
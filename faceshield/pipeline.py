@@ -0,0 +1,111 @@
+import queue
+import threading
+
+
+_END = object()
+
+# How often blocked queue operations wake up to check for a stop request
+POLL_S = 0.1
+
+
+def run_pipeline(source, stages, sink, should_stop=None, maxsize=2) -> bool:
+    """Run ``source -> stages... -> sink`` with one thread per stage.
+
+    ``source`` is an iterable consumed on its own thread (the decoder), every
+    callable of ``stages`` maps one item to the next on its own thread and
+    ``sink(item)`` consumes the final items (the encoder). Stages are joined by
+    bounded FIFO queues of ``maxsize`` items, so item order is preserved and a
+    slow stage applies backpressure to the ones before it.
+
+    ``should_stop()`` is polled by every stage; once it returns True all threads
+    wind down without draining their queues. The first exception raised by any
+    stage stops the pipeline and is re-raised here. Returns ``False`` when the
+    run was stopped before the sink saw every item.
+    """
+    stop = threading.Event()
+    errors = []
+    finished = threading.Event()
+    queues = [queue.Queue(maxsize=max(1, int(maxsize))) for _ in range(len(stages) + 1)]
+
+    def stopped():
+        if stop.is_set():
+            return True
+        if should_stop is not None and should_stop():
+            stop.set()
+            return True
+        return False
+
+    def put(q, item):
+        while not stopped():
+            try:
+                q.put(item, timeout=POLL_S)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q):
+        while not stopped():
+            try:
+                return q.get(timeout=POLL_S)
+            except queue.Empty:
+                continue
+        return _END
+
+    def guarded(fn):
+        def run():
+            try:
+                fn()
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+        return run
+
+    def produce():
+        for item in source:
+            if not put(queues[0], item):
+                return
+        put(queues[0], _END)
+
+    def make_stage(fn, q_in, q_out):
+        def run():
+            while True:
+                item = get(q_in)
+                if item is _END:
+                    put(q_out, _END)
+                    return
+                if not put(q_out, fn(item)):
+                    return
+        return run
+
+    def consume():
+        while True:
+            item = get(queues[-1])
+            if item is _END:
+                if not stopped():
+                    finished.set()
+                return
+            sink(item)
+
+    targets = [produce]
+    for i, fn in enumerate(stages):
+        targets.append(make_stage(fn, queues[i], queues[i + 1]))
+    targets.append(consume)
+
+    threads = [threading.Thread(target=guarded(t), daemon=True) for t in targets]
+    for t in threads:
+        t.start()
+    try:
+        for t in threads:
+            t.join()
+    except BaseException:
+        # Ctrl+C while waiting: the workers still hold the caller's capture and
+        # writer, so they must be finished before the exception reaches them
+        stop.set()
+        for t in threads:
+            t.join()
+        raise
+
+    if errors:
+        raise errors[0]
+    return finished.is_set()
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import cv2
+
+
+class Preview:
+    """Live preview window fed with the latest frame only.
+
+    The processing thread calls :meth:`offer` for every frame; that costs one
+    clock check unless a refresh is due (``max_fps``), in which case the frame
+    is downscaled to fit ``max_size`` and replaces any frame not shown yet.
+    A separate thread owns the OpenCV window, so ``imshow``/``waitKey`` never
+    run in the hot loop. Pressing 'q' in the window calls ``on_quit``.
+    """
+
+    def __init__(self, title, on_quit=None, max_fps=12.0, max_size=(960, 540)):
+        self.title = title
+        self.on_quit = on_quit
+        self.period = 1.0 / max(1.0, float(max_fps))
+        self.max_w, self.max_h = max_size
+
+        self._latest = None
+        self._next_due = 0.0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def offer(self, frame):
+        now = time.monotonic()
+        if now < self._next_due:
+            return
+        self._next_due = now + self.period
+
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.max_w / w, self.max_h / h)
+        if scale < 1.0:
+            small = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        else:
+            small = frame.copy()
+        with self._cond:
+            self._latest = small
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+
+    def _run(self):
+        try:
+            while True:
+                with self._cond:
+                    if self._latest is None and not self._closed:
+                        self._cond.wait(timeout=self.period)
+                    if self._closed:
+                        return
+                    frame, self._latest = self._latest, None
+
+                if frame is not None:
+                    cv2.imshow(self.title, frame)
+                # Keeps the window responsive and polls 'q' even when no frame arrives
+                if cv2.waitKey(1) & 0xFF == ord("q") and self.on_quit is not None:
+                    self.on_quit()
+        finally:
+            cv2.destroyAllWindows()
@@ -0,0 +1,190 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Span order in the summary table; other names follow alphabetically
+ORDER = (
+    "decode", "infer", "infer.preprocess", "infer.forward", "infer.nms", "infer.transfer",
+    "blur", "encode", "encode.flush",
+)
+
+_NO_SPAN = nullcontext()
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (0 when unknown)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far (0 when unknown)."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+    except Exception:
+        return 0
+
+
+def span_of(profiler, name, frames=1):
+    """``profiler.span(...)`` or a no-op context when ``profiler`` is None."""
+    return _NO_SPAN if profiler is None else profiler.span(name, frames)
+
+
+class Profiler:
+    """Per-stage timings and memory high-water marks of one run.
+
+    Each pipeline stage wraps its work in :meth:`span`; a span costs two clock
+    reads, one RSS read and a list append, so profiling can stay on for whole
+    videos. Events keep the thread they ran on, which makes the stage overlap
+    visible in the Chrome trace (``chrome://tracing`` / Perfetto).
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.wall0 = time.time()
+        # (name, thread id, start s, duration s, frames)
+        self.events = []
+        self.rss = []  # (t s, rss bytes), one sample per span
+        self.mem_high = {}
+        self.gpu_peak = 0
+        self.threads = {}
+        # Extra per-run figures (e.g. frame pool size), shown under the table
+        self.counters = {}
+
+    @contextmanager
+    def span(self, name, frames=1):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, t, time.perf_counter() - t, frames)
+
+    def record(self, name, start, duration, frames=1):
+        """Add a span that started at ``start`` (``perf_counter`` time)."""
+        tid = threading.get_ident()
+        if tid not in self.threads:
+            self.threads[tid] = threading.current_thread().name
+        rss = rss_bytes()
+        self.events.append((name, tid, start - self.t0, duration, frames))
+        self.rss.append((start + duration - self.t0, rss))
+        if rss > self.mem_high.get(name, 0):
+            self.mem_high[name] = rss
+
+    def finish(self):
+        """Collect process-wide high-water marks at the end of the run."""
+        try:
+            import torch
+            if torch.cuda.is_available():
+                self.gpu_peak = torch.cuda.max_memory_allocated()
+        except ImportError:
+            pass
+
+    def rss_growth(self) -> int:
+        """Highest RSS sample of the second half of the run minus that of the first."""
+        if len(self.rss) < 2:
+            return 0
+        mid = self.rss[-1][0] / 2
+        first = max((r for t, r in self.rss if t <= mid), default=0)
+        second = max((r for t, r in self.rss if t > mid), default=0)
+        return second - first
+
+    def stats(self):
+        """``{name: {calls, frames, total_s, ms_per_frame, p50_ms, p95_ms, rss_high}}``."""
+        per = {}
+        for name, _, _, dur, frames in self.events:
+            per.setdefault(name, []).append((dur, frames))
+        out = {}
+        for name, items in per.items():
+            durs = sorted(d for d, _ in items)
+            total = sum(durs)
+            frames = sum(n for _, n in items)
+            out[name] = {
+                "calls": len(items),
+                "frames": frames,
+                "total_s": total,
+                "ms_per_frame": 1000.0 * total / frames if frames else 0.0,
+                "p50_ms": 1000.0 * durs[len(durs) // 2],
+                "p95_ms": 1000.0 * durs[min(len(durs) - 1, int(len(durs) * 0.95))],
+                "rss_high": self.mem_high.get(name, 0),
+            }
+        return out
+
+    def summary(self) -> str:
+        """Plain-text table: one row per stage, then wall time and memory."""
+        stats = self.stats()
+        names = [n for n in ORDER if n in stats] + sorted(n for n in stats if n not in ORDER)
+        wall = max((start + dur for _, _, start, dur, _ in self.events), default=0.0)
+
+        head = f"{'stage':<18}{'calls':>7}{'frames':>8}{'total s':>9}{'ms/frame':>10}{'p50 ms':>9}{'p95 ms':>9}{'RSS MB':>9}"
+        lines = [head, "-" * len(head)]
+        for n in names:
+            st = stats[n]
+            lines.append(
+                f"{n:<18}{st['calls']:>7}{st['frames']:>8}{st['total_s']:>9.2f}{st['ms_per_frame']:>10.2f}"
+                f"{st['p50_ms']:>9.2f}{st['p95_ms']:>9.2f}{st['rss_high'] / 2**20:>9.0f}"
+            )
+        lines.append("-" * len(head))
+        encoded = stats.get("encode", {}).get("frames", 0)
+        fps = encoded / wall if wall > 0 else 0.0
+        lines.append(f"wall {wall:.2f}s, {encoded} frames, {fps:.1f} fps")
+        mem = f"peak RSS {peak_rss_bytes() / 2**20:.0f} MB"
+        if self.gpu_peak:
+            mem += f", peak CUDA {self.gpu_peak / 2**20:.0f} MB"
+        lines.append(mem)
+        if self.counters:
+            lines.append(", ".join(f"{k} {v}" for k, v in self.counters.items()))
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """Timeline in the Chrome trace event format (microsecond timestamps)."""
+        pid = os.getpid()
+        ev = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}}
+            for tid, tname in self.threads.items()
+        ]
+        for name, tid, start, dur, frames in self.events:
+            ev.append({
+                "name": name, "cat": name.split(".")[0], "ph": "X", "pid": pid, "tid": tid,
+                "ts": round(start * 1e6, 1), "dur": round(dur * 1e6, 1), "args": {"frames": frames},
+            })
+        for t, rss in self.rss:
+            ev.append({
+                "name": "memory", "ph": "C", "pid": pid, "ts": round(t * 1e6, 1),
+                "args": {"rss_mb": round(rss / 2**20, 1)},
+            })
+        return {
+            "traceEvents": ev,
+            "displayTimeUnit": "ms",
+            "otherData": {"started": self.wall0, "stats": self.stats(), "counters": self.counters},
+        }
+
+    def save(self, base):
+        """Write ``<base>.profile.txt`` and ``<base>.profile.json``; returns both paths."""
+        txt, trace = base + ".profile.txt", base + ".profile.json"
+        with open(txt, "w", encoding="utf-8") as f:
+            f.write(self.summary() + "\n")
+        with open(trace, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+        return txt, trace
@@ -0,0 +1,70 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+
+STAGES = ("decode", "infer", "blur", "encode")
+
+
+@dataclass
+class Snapshot:
+    p: float = 0.0
+    remaining: float = -1.0  # seconds, -1 when unknown
+    fps: float = 0.0
+    processed: int = 0
+    total: int = 0
+    stage_fps: dict = field(default_factory=dict)
+
+
+class ProgressChannel:
+    """Frame counters the worker publishes to and the UI polls at its own rate.
+
+    Every stage only ever increments its own counter, so publishing is a plain
+    integer add with no lock and no Tk callback on the hot path. Throughput and
+    ETA are computed on the reader side from a moving window of samples, which
+    keeps them smooth instead of following raw per-frame timing.
+    """
+
+    def __init__(self, window_s=5.0):
+        self.window_s = float(window_s)
+        self.total = 0
+        self.counts = dict.fromkeys(STAGES, 0)
+        self._samples = deque()
+
+    def start(self, total):
+        self.total = max(0, int(total))
+        self.counts = dict.fromkeys(STAGES, 0)
+        self._samples.clear()
+
+    def add(self, stage, n=1):
+        # Single writer per stage: no lost updates without a lock
+        self.counts[stage] += n
+
+    def set(self, stage, n):
+        self.counts[stage] = n
+
+    @property
+    def processed(self):
+        return self.counts["encode"]
+
+    def poll(self) -> Snapshot:
+        """Sample the counters (reader side) and return the current snapshot."""
+        now = time.time()
+        counts = dict(self.counts)
+        self._samples.append((now, counts))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= self.window_s:
+            self._samples.popleft()
+
+        t_old, old = self._samples[0]
+        dt = now - t_old
+        stage_fps = {s: (counts[s] - old[s]) / dt if dt > 0 else 0.0 for s in STAGES}
+
+        processed = counts["encode"]
+        fps = stage_fps["encode"]
+        if self.total > 0:
+            p = min(1.0, processed / self.total)
+            remaining = (self.total - processed) / fps if fps > 0 else -1
+        else:
+            p = 0.0
+            remaining = -1
+        return Snapshot(p, remaining, fps, processed, self.total, stage_fps)
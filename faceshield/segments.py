@@ -0,0 +1,215 @@
+import dataclasses
+import multiprocessing as mp
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from .encoders import open_cv_writer
+from .engine import probe_video
+
+
+# Minimum time between progress messages sent by a worker process
+PROGRESS_EVERY_S = 0.25
+
+
+def keyframe_times(src):
+    """Keyframe timestamps (seconds) of the first video stream via ffprobe.
+
+    Returns an empty list when ffprobe is not installed or fails; callers then
+    cut at plain frame positions.
+    """
+    exe = shutil.which("ffprobe")
+    if not exe:
+        return []
+    cmd = [
+        exe, "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", src
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, timeout=120, check=True).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+
+    times = []
+    for line in out.splitlines():
+        parts = line.strip().split(",")
+        if len(parts) >= 2 and "K" in parts[1]:
+            try:
+                times.append(float(parts[0]))
+            except ValueError:
+                continue
+    return sorted(times)
+
+
+def plan_segments(total_frames, n, fps=25.0, keyframes=()):
+    """Split ``[0, total_frames)`` into up to ``n`` ``(start, end)`` frame ranges.
+
+    Cut points are spread evenly and then snapped to the nearest keyframe when
+    ``keyframes`` (seconds) are known, so every worker starts decoding right at
+    a keyframe instead of decoding forward from the previous one.
+    """
+    n = max(1, min(int(n), total_frames))
+    key_idx = sorted({int(round(t * fps)) for t in keyframes})
+
+    cuts = []
+    for i in range(1, n):
+        c = total_frames * i // n
+        if key_idx:
+            c = min(key_idx, key=lambda k: abs(k - c))
+        if 0 < c < total_frames and (not cuts or c > cuts[-1]):
+            cuts.append(c)
+
+    bounds = [0] + cuts + [total_frames]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def concat_videos(parts, dst, fps, w, h, audio_src=None):
+    """Join segment files into ``dst`` in order.
+
+    Uses ffmpeg's concat demuxer (stream copy, no re-encode) when available,
+    also copying the audio of ``audio_src`` if given. Only when ffmpeg is not
+    installed are the frames decoded and re-written with OpenCV; a failing
+    ffmpeg raises with its error output instead of silently changing the
+    format and dropping the audio.
+    """
+    exe = shutil.which("ffmpeg")
+    if exe:
+        list_path = dst + ".parts.txt"
+        with open(list_path, "w", encoding="utf-8") as f:
+            for p in parts:
+                f.write("file '{}'\n".format(os.path.abspath(p).replace("'", "'\\''")))
+        cmd = [exe, "-v", "error", "-nostdin", "-y", "-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_src:
+            cmd += ["-i", audio_src, "-map", "0:v:0", "-map", "1:a?", "-shortest"]
+        cmd += ["-c", "copy", dst]
+        try:
+            proc = subprocess.run(cmd, stdin=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        finally:
+            os.remove(list_path)
+        if proc.returncode != 0:
+            err = proc.stderr.decode(errors="replace").strip()
+            raise RuntimeError(f"ffmpeg concat failed ({proc.returncode}): {err[-500:]}")
+        return
+
+    writer = open_cv_writer(dst, fps, w, h)
+    try:
+        for p in parts:
+            cap = cv2.VideoCapture(p)
+            while True:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                writer.write(frame)
+            cap.release()
+    finally:
+        writer.release()
+
+
+def _run_segment(settings, src, dst, start, end, threads, seg_id, progress_q, stop_event):
+    # Runs in a worker process: own model instance and CPU thread budget
+    import torch
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(1)
+
+    from .engine import Engine
+
+    engine = Engine(settings)
+    done = 0
+    last = 0.0
+
+    def on_frame(frame):
+        nonlocal done, last
+        done += 1
+        now = time.time()
+        if now - last >= PROGRESS_EVERY_S:
+            last = now
+            progress_q.put((seg_id, done))
+
+    ok = engine.process_video(
+        src, dst, on_frame=on_frame, should_stop=stop_event.is_set, start=start, end=end
+    )
+    progress_q.put((seg_id, done))
+    return ok
+
+
+def process_segmented(settings, src, dst, on_progress=None, should_stop=None, metrics=None) -> bool:
+    """Process ``src`` as ``settings.workers`` segments in parallel processes.
+
+    Each worker loads its own model and gets ``cpu_count // workers`` threads.
+    Finished segments are stitched into ``dst`` in order. ``on_progress`` and
+    ``should_stop`` behave as in :meth:`Engine.process_video` and are called
+    from this (the parent) thread; ``metrics`` only receives the total count of
+    encoded frames. Returns ``False`` when stopped early; no
+    output is written in that case. ``settings.profile`` is not supported
+    across processes and is ignored here.
+    """
+    fps, w, h, total_frames = probe_video(src)
+    if total_frames <= 0:
+        raise RuntimeError("Segmented processing needs a known frame count.")
+
+    segments = plan_segments(total_frames, settings.workers, fps, keyframe_times(src))
+    threads = max(1, (os.cpu_count() or 1) // len(segments))
+    # Each worker gets its share of an adaptive fps target
+    child = dataclasses.replace(
+        settings, workers=1, profile=False, target_fps=settings.target_fps / len(segments)
+    )
+
+    ext = os.path.splitext(dst)[1] or ".mp4"
+    tmp_dir = tempfile.mkdtemp(prefix=".faceshield_", dir=os.path.dirname(os.path.abspath(dst)))
+    parts = [os.path.join(tmp_dir, f"part{i:04d}{ext}") for i in range(len(segments))]
+
+    ctx = mp.get_context("spawn")
+    manager = ctx.Manager()
+    try:
+        progress_q = manager.Queue()
+        stop_event = manager.Event()
+        done = [0] * len(segments)
+        t0 = time.time()
+        if metrics is not None:
+            metrics.start(total_frames)
+
+        with ProcessPoolExecutor(max_workers=len(segments), mp_context=ctx) as pool:
+            futures = [
+                pool.submit(_run_segment, child, src, parts[i], a, b, threads, i, progress_q, stop_event)
+                for i, (a, b) in enumerate(segments)
+            ]
+
+            while not all(f.done() for f in futures):
+                if should_stop is not None and should_stop():
+                    stop_event.set()
+                try:
+                    seg_id, n = progress_q.get(timeout=PROGRESS_EVERY_S)
+                    done[seg_id] = n
+                    while True:
+                        seg_id, n = progress_q.get_nowait()
+                        done[seg_id] = n
+                except queue.Empty:
+                    pass
+
+                if metrics is not None:
+                    metrics.set("encode", sum(done))
+                if on_progress is not None:
+                    processed = sum(done)
+                    elapsed = time.time() - t0
+                    fps_proc = processed / elapsed if elapsed > 0 else 0.0
+                    remaining = (total_frames - processed) / fps_proc if fps_proc > 0 else -1
+                    on_progress(processed / total_frames, remaining)
+
+            results = [f.result() for f in futures]
+
+        if stop_event.is_set() or not all(results):
+            return False
+
+        concat_videos(parts, dst, fps, w, h, audio_src=src if settings.encoder == "ffmpeg" else None)
+        if on_progress is not None:
+            on_progress(1.0, 0)
+        return True
+    finally:
+        manager.shutdown()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,393 @@
+"""Local job server: warm models, a priority queue and job status over HTTP.
+
+    python -m faceshield.server --model yolov8l_100e.pt --slots 2 --cpus 8
+
+    POST   /jobs        {"input": "a.mp4", "output": "a_blurred.mp4", "priority": 0,
+                         "overwrite": false, "settings": {"imgsz": 960, "method": "box"}}
+    GET    /jobs        all jobs, newest first
+    GET    /jobs/<id>   status, progress and ETA of one job
+    DELETE /jobs/<id>   cancel a queued or running job
+    GET    /health      slots, queue length and loaded models
+
+The server only listens on localhost and only answers requests addressed to
+``127.0.0.1:<port>`` or ``localhost:<port>`` without an ``Origin`` header, and
+jobs must be posted as ``application/json``, so web pages open in a browser
+cannot submit jobs or read them. ``settings`` may only change the processing
+options in :data:`JOB_SETTINGS`; the model and backend are the server's. An
+existing output is only replaced with ``"overwrite": true``. Lower
+``priority`` values run first; equal priorities run in submission order.
+"""
+
+import argparse
+import dataclasses
+import heapq
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .anonymize import METHODS, SHAPES
+from .encoders import CODECS, ENCODERS, PRESETS
+from .engine import Engine, Settings
+from .utils import fmt_time
+
+# Engines kept warm per slot (different models / backends)
+ENGINES_PER_SLOT = 2
+# Finished jobs kept for status queries
+KEEP_FINISHED = 500
+# Settings a job may override (no model files, paths or process options)
+JOB_SETTINGS = (
+    "conf", "iou", "imgsz", "blur", "method", "shape", "batch", "tiles", "tile_overlap",
+    "coarse_imgsz", "interval", "track_pad", "motion", "cache", "encoder", "codec", "preset",
+    "crf", "target_fps", "deadline_s",
+)
+# Accepted values of those settings (the CLI's choices); numbers as inclusive (min, max)
+JOB_CHOICES = {
+    "method": METHODS, "shape": SHAPES, "encoder": ENCODERS, "codec": CODECS, "preset": PRESETS,
+}
+JOB_RANGES = {
+    "conf": (0.0, 1.0), "iou": (0.0, 1.0), "imgsz": (32, 8192), "blur": (1, 1001), "batch": (1, 256),
+    "tiles": (0, 16), "tile_overlap": (0.0, 0.9), "coarse_imgsz": (0, 8192), "interval": (1, 1000),
+    "track_pad": (0.0, 10.0), "crf": (0, 51), "target_fps": (0.0, 10000.0), "deadline_s": (0.0, 1e7),
+}
+
+
+@dataclasses.dataclass
+class Job:
+    id: str
+    src: str
+    dst: str
+    settings: Settings
+    priority: int = 0
+    status: str = "queued"  # queued, running, done, failed, cancelled
+    progress: float = 0.0
+    remaining: float = -1.0
+    error: str = ""
+    report: str = ""
+    created: float = dataclasses.field(default_factory=time.time)
+    started: float = 0.0
+    finished: float = 0.0
+    cancel: bool = False
+
+    def to_dict(self) -> dict:
+        d = {
+            "id": self.id, "input": self.src, "output": self.dst, "priority": self.priority,
+            "status": self.status, "progress": round(self.progress, 4), "error": self.error,
+            "report": self.report, "created": self.created, "started": self.started,
+            "finished": self.finished,
+        }
+        d["eta"] = fmt_time(self.remaining) if self.status == "running" and self.remaining >= 0 else ""
+        return d
+
+
+def settings_with(base, overrides) -> Settings:
+    """``base`` with ``overrides`` applied; values are converted to the field's type.
+
+    Only the fields in :data:`JOB_SETTINGS` can be overridden, with values from
+    :data:`JOB_CHOICES` / within :data:`JOB_RANGES`; anything else raises
+    ``ValueError`` (a 400 for the client, not a failed job later).
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("settings must be an object")
+    refused = sorted(set(overrides) - set(JOB_SETTINGS))
+    if refused:
+        raise ValueError(f"Setting(s) not allowed per job: {', '.join(refused)}")
+    values = {}
+    for k, v in overrides.items():
+        cur = getattr(base, k)
+        values[k] = (str(v).lower() in ("1", "true", "yes")) if isinstance(cur, bool) else type(cur)(v)
+        if k in JOB_CHOICES and values[k] not in JOB_CHOICES[k]:
+            raise ValueError(f"{k} must be one of: {', '.join(JOB_CHOICES[k])}")
+        if k in JOB_RANGES:
+            lo, hi = JOB_RANGES[k]
+            if not lo <= values[k] <= hi:
+                raise ValueError(f"{k} must be between {lo} and {hi}")
+    # Jobs already run side by side; no nested worker processes
+    values["workers"] = 1
+    return dataclasses.replace(base, **values)
+
+
+class JobServer:
+    """Runs submitted jobs on ``slots`` worker threads with warm engines.
+
+    Every slot keeps up to :data:`ENGINES_PER_SLOT` loaded engines and reuses
+    one whenever a job's settings allow it (:meth:`Engine.matches`), so only the
+    first job per model pays the load and warm-up cost.
+
+    PyTorch's and OpenCV's thread counts are process-wide, so they cannot be
+    limited per slot: :meth:`start` sets them once, before any slot runs, to
+    ``cpus // slots`` threads per call. With every slot busy that keeps about
+    ``cpus`` threads working, but it is not a hard budget per slot (an idle
+    slot's share is not lent out, and ONNX Runtime / OpenVINO size their own
+    thread pools).
+    """
+
+    def __init__(self, base: Settings, slots=1, cpus=None):
+        self.base = base
+        self.slots = max(1, int(slots))
+        self.cpus = max(1, int(cpus or os.cpu_count() or 1))
+        self.threads = max(1, self.cpus // self.slots)  # per PyTorch / OpenCV call, process-wide
+        self.jobs = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._engines = [[] for _ in range(self.slots)]
+        self._threads = [
+            threading.Thread(target=self._run_slot, args=(i,), daemon=True, name=f"slot-{i}")
+            for i in range(self.slots)
+        ]
+
+    def start(self, preload=True):
+        # Process-wide settings: made once here, never per slot or job, so
+        # concurrent slots cannot overwrite each other's value
+        try:
+            import torch
+            torch.set_num_threads(self.threads)
+        except ImportError:
+            pass
+        import cv2
+        cv2.setNumThreads(self.threads)
+
+        if preload:
+            for engines in self._engines:
+                engines.append(Engine(self.base).warmup())
+        for t in self._threads:
+            t.start()
+        return self
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            for job in self.jobs.values():
+                job.cancel = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout=5.0)
+
+    def submit(self, src, dst="", priority=0, overrides=None, overwrite=False) -> Job:
+        src = os.path.abspath(src)
+        if not os.path.isfile(src):
+            raise ValueError(f"Input not found: {src}")
+        if not dst:
+            stem = os.path.splitext(src)[0]
+            dst = f"{stem}_blurred.mp4"
+        dst = os.path.abspath(dst)
+        if os.path.exists(dst):
+            if os.path.samefile(src, dst):
+                raise ValueError("Output must not be the input")
+            if not overwrite:
+                raise ValueError(f"Output exists (set \"overwrite\": true to replace it): {dst}")
+            if not os.path.isfile(dst):
+                raise ValueError(f"Output is not a file: {dst}")
+        job = Job(
+            id=uuid.uuid4().hex[:12], src=src, dst=dst,
+            settings=settings_with(self.base, overrides or {}), priority=int(priority),
+        )
+        with self._cond:
+            self.jobs[job.id] = job
+            heapq.heappush(self._heap, (job.priority, next(self._seq), job.id))
+            self._prune()
+            self._cond.notify()
+        return job
+
+    def cancel(self, job_id) -> bool:
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if job is None or job.status not in ("queued", "running"):
+                return False
+            job.cancel = True
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished = time.time()
+            return True
+
+    def status(self) -> dict:
+        with self._cond:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            models = sorted({
+                f"{os.path.basename(e.settings.model)} ({e.settings.backend})"
+                for engines in self._engines for e in engines
+            })
+        return {
+            "slots": self.slots, "cpus": self.cpus, "threads_per_call": self.threads,
+            "jobs": counts, "models": models,
+        }
+
+    def _prune(self):
+        done = [j for j in self.jobs.values() if j.status in ("done", "failed", "cancelled")]
+        for job in sorted(done, key=lambda j: j.finished)[:max(0, len(done) - KEEP_FINISHED)]:
+            del self.jobs[job.id]
+
+    def _next_job(self):
+        with self._cond:
+            while not self._closed:
+                while self._heap:
+                    _, _, job_id = heapq.heappop(self._heap)
+                    job = self.jobs.get(job_id)
+                    if job is not None and job.status == "queued":
+                        job.status = "running"
+                        job.started = time.time()
+                        return job
+                self._cond.wait()
+            return None
+
+    def _engine_for(self, slot, settings):
+        engines = self._engines[slot]
+        for i, engine in enumerate(engines):
+            if engine.matches(settings):
+                engines.insert(0, engines.pop(i))
+                engine.settings = settings
+                return engine
+        engine = Engine(settings)
+        engines.insert(0, engine)
+        del engines[ENGINES_PER_SLOT:]
+        return engine
+
+    def _run_slot(self, slot):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+
+            def on_progress(p, remaining, job=job):
+                job.progress = p
+                job.remaining = remaining
+
+            try:
+                engine = self._engine_for(slot, job.settings)
+                ok = engine.process_video(
+                    job.src, job.dst, on_progress=on_progress, should_stop=lambda job=job: job.cancel
+                )
+                job.report = engine.last_report
+                job.status = "done" if ok else "cancelled"
+                if ok:
+                    job.progress = 1.0
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            job.finished = time.time()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FaceShield"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _refused(self):
+        """Error for requests that may come from a web page (DNS rebinding, cross-origin), else ``None``."""
+        port = self.server.server_address[1]
+        if self.headers.get("Host", "") not in (f"127.0.0.1:{port}", f"localhost:{port}"):
+            return "bad Host header"
+        if self.headers.get("Origin"):
+            return "cross-origin requests are not accepted"
+        return None
+
+    def _job_id(self):
+        parts = self.path.rstrip("/").split("/")
+        return parts[2] if len(parts) == 3 and parts[1] == "jobs" else None
+
+    def do_GET(self):
+        refused = self._refused()
+        if refused:
+            return self._send(403, {"error": refused})
+        jobs = self.server.jobs
+        if self.path.rstrip("/") == "/health":
+            return self._send(200, jobs.status())
+        if self.path.rstrip("/") == "/jobs":
+            with jobs._cond:
+                items = sorted(jobs.jobs.values(), key=lambda j: j.created, reverse=True)
+                return self._send(200, [j.to_dict() for j in items])
+        job = jobs.jobs.get(self._job_id() or "")
+        if job is None:
+            return self._send(404, {"error": "not found"})
+        return self._send(200, job.to_dict())
+
+    def do_POST(self):
+        refused = self._refused()
+        if refused:
+            return self._send(403, {"error": refused})
+        if self.path.rstrip("/") != "/jobs":
+            return self._send(404, {"error": "not found"})
+        # Browsers cannot send JSON cross-origin without a preflight this server never answers
+        if self.headers.get_content_type() != "application/json":
+            return self._send(415, {"error": "Content-Type must be application/json"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            req = json.loads(self.rfile.read(length) or b"{}")
+            job = self.server.jobs.submit(
+                req["input"], req.get("output", ""), req.get("priority", 0), req.get("settings"),
+                overwrite=req.get("overwrite") is True,
+            )
+        except (KeyError, ValueError, TypeError) as e:
+            return self._send(400, {"error": str(e) or "bad request"})
+        return self._send(201, job.to_dict())
+
+    def do_DELETE(self):
+        refused = self._refused()
+        if refused:
+            return self._send(403, {"error": refused})
+        job_id = self._job_id()
+        if job_id is None or job_id not in self.server.jobs.jobs:
+            return self._send(404, {"error": "not found"})
+        if not self.server.jobs.cancel(job_id):
+            return self._send(409, {"error": "job already finished"})
+        return self._send(200, self.server.jobs.jobs[job_id].to_dict())
+
+
+def serve(jobs: JobServer, port=8765):
+    """HTTP front end for ``jobs`` on 127.0.0.1:``port`` (blocks)."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", int(port)), _Handler)
+    httpd.jobs = jobs
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
+
+
+def main(argv=None) -> int:
+    d = Settings()
+    ap = argparse.ArgumentParser(prog="faceshield.server", description=__doc__.splitlines()[0])
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--slots", type=int, default=1, help="Jobs processed at the same time.")
+    ap.add_argument("--cpus", type=int, default=os.cpu_count() or 1,
+                    help="CPU threads for all slots (set process-wide: --cpus / --slots per call).")
+    ap.add_argument("-m", "--model", default=d.model, help="Default model, loaded at start-up.")
+    ap.add_argument("--backend", default=d.backend)
+    ap.add_argument("--imgsz", type=int, default=d.imgsz)
+    args = ap.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        print(f"Model not found: {args.model}", file=sys.stderr)
+        return 2
+
+    t0 = time.time()
+    jobs = JobServer(Settings(model=args.model, backend=args.backend, imgsz=args.imgsz),
+                     slots=args.slots, cpus=args.cpus).start()
+    print(f"{args.slots} slot(s) warm in {time.time() - t0:.1f}s; listening on http://127.0.0.1:{args.port}")
+    try:
+        serve(jobs, args.port)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        jobs.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import math
+
+import numpy as np
+
+from .tracker import iou_matrix
+
+
+def make_tiles(w, h, tiles, overlap=0.2):
+    """Overlapping crop windows ``(x1, y1, x2, y2)`` covering a ``w`` x ``h`` frame.
+
+    ``tiles`` is the number of columns; rows follow the frame's aspect ratio.
+    Neighbouring windows share ``overlap`` of a tile so a face cut by one
+    window's border appears whole in the next one.
+    """
+    cols = max(1, int(tiles))
+    rows = max(1, int(round(cols * h / w)))
+
+    def spans(length, n):
+        if n == 1:
+            return [(0, length)]
+        size = int(math.ceil(length / (n - (n - 1) * overlap)))
+        step = (length - size) / (n - 1)
+        return [(int(round(i * step)), int(round(i * step)) + size) for i in range(n)]
+
+    return [(x1, y1, x2, y2) for (y1, y2) in spans(h, rows) for (x1, x2) in spans(w, cols)]
+
+
+def merge_detections(xyxy, conf, iou_thresh=0.45, contain_thresh=0.6):
+    """Class-agnostic NMS that also folds seam fragments into the kept box.
+
+    Boxes overlapping a higher-scored one by more than ``iou_thresh`` IoU, or
+    lying mostly inside it (intersection over the smaller area above
+    ``contain_thresh``), are removed; the kept box grows to their union so a
+    face split across a tile seam stays fully covered.
+    """
+    if xyxy is None or len(xyxy) == 0:
+        return None, None
+    order = np.argsort(-conf)
+    xyxy = xyxy[order].astype(np.float32)
+    conf = conf[order]
+
+    iou = iou_matrix(xyxy, xyxy)
+    area = (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+    ix1 = np.maximum(xyxy[:, None, 0], xyxy[None, :, 0])
+    iy1 = np.maximum(xyxy[:, None, 1], xyxy[None, :, 1])
+    ix2 = np.minimum(xyxy[:, None, 2], xyxy[None, :, 2])
+    iy2 = np.minimum(xyxy[:, None, 3], xyxy[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    iomin = inter / np.maximum(np.minimum(area[:, None], area[None, :]), 1e-6)
+    dup = (iou > iou_thresh) | (iomin > contain_thresh)
+
+    alive = np.ones(len(xyxy), dtype=bool)
+    keep_boxes, keep_conf = [], []
+    for i in range(len(xyxy)):
+        if not alive[i]:
+            continue
+        group = np.flatnonzero(dup[i] & alive)
+        alive[group] = False
+        g = xyxy[group]
+        keep_boxes.append([g[:, 0].min(), g[:, 1].min(), g[:, 2].max(), g[:, 3].max()])
+        keep_conf.append(conf[i])
+    return np.array(keep_boxes, dtype=np.float32), np.array(keep_conf, dtype=np.float32)
+
+
+def detect_tiled(predict, frames, imgsz, tiles, overlap=0.2, coarse_imgsz=0, iou_thresh=0.45):
+    """Detect faces on overlapping tiles of every frame.
+
+    ``predict(images, imgsz)`` runs the detector on a list of images as one
+    batch and returns ``(xyxy, conf)`` per image. All tiles of all ``frames``
+    go through a single call at ``imgsz``; with ``coarse_imgsz`` a second,
+    low-resolution full-frame pass catches faces larger than a tile. Boxes are
+    mapped back to frame coordinates and duplicates across seams merged.
+    """
+    if not frames:
+        return []
+    h, w = frames[0].shape[:2]
+    windows = make_tiles(w, h, tiles, overlap)
+
+    crops = [f[y1:y2, x1:x2] for f in frames for (x1, y1, x2, y2) in windows]
+    tile_dets = predict(crops, imgsz)
+    coarse = predict(frames, coarse_imgsz) if coarse_imgsz else [(None, None)] * len(frames)
+
+    out = []
+    for fi in range(len(frames)):
+        boxes, scores = [], []
+        for ti, (x1, y1, _, _) in enumerate(windows):
+            xyxy, conf = tile_dets[fi * len(windows) + ti]
+            if xyxy is not None and len(xyxy):
+                boxes.append(xyxy + np.array([x1, y1, x1, y1], dtype=xyxy.dtype))
+                scores.append(conf)
+        xyxy, conf = coarse[fi]
+        if xyxy is not None and len(xyxy):
+            boxes.append(xyxy)
+            scores.append(conf)
+
+        if boxes:
+            out.append(merge_detections(np.concatenate(boxes), np.concatenate(scores), iou_thresh))
+        else:
+            out.append((None, None))
+    return out
@@ -0,0 +1,158 @@
+import numpy as np
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU of two ``(N, 4)`` / ``(M, 4)`` xyxy arrays -> ``(N, M)``."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0).astype(np.float32)
+
+
+def center_distance_matrix(a, b):
+    """Centre distance of ``a`` to ``b`` boxes, in units of each ``a`` box's diagonal."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    ca = (a[:, :2] + a[:, 2:]) / 2
+    cb = (b[:, :2] + b[:, 2:]) / 2
+    diag = np.hypot(a[:, 2] - a[:, 0], a[:, 3] - a[:, 1])
+    dist = np.hypot(ca[:, None, 0] - cb[None, :, 0], ca[:, None, 1] - cb[None, :, 1])
+    return (dist / np.maximum(diag[:, None], 1e-6)).astype(np.float32)
+
+
+def greedy_match(score, thresh, used_r=(), used_c=(), higher_is_better=True):
+    """Match rows to columns by best ``score``. Returns ``[(row, col), ...]``."""
+    pairs = []
+    if score.size == 0:
+        return pairs
+    used_r, used_c = set(used_r), set(used_c)
+    order = np.argsort(score, axis=None)
+    if higher_is_better:
+        order = order[::-1]
+    for flat in order:
+        r, c = divmod(int(flat), score.shape[1])
+        v = score[r, c]
+        if (v < thresh) if higher_is_better else (v > thresh):
+            break
+        if r in used_r or c in used_c:
+            continue
+        used_r.add(r)
+        used_c.add(c)
+        pairs.append((r, c))
+    return pairs
+
+
+class BoxTracker:
+    """Carries face boxes through the frames between two detector keyframes.
+
+    Keyframe detections are associated with the existing tracks by IoU (and by
+    centre distance for faces that moved further than their own size) and give
+    each track a constant per-frame velocity. On the frames in between, every
+    track is moved along its velocity and padded by ``pad`` of its size plus the
+    distance it may have drifted since the keyframe, so a moving face stays
+    inside the blurred area. Tracks without a velocity yet are assumed to drift
+    up to ``pad`` of their size per frame. A track the detector misses is kept
+    (padded) for ``max_misses`` more keyframes rather than dropped straight away.
+    """
+
+    def __init__(self, iou_thresh=0.2, pad=0.15, max_misses=1, max_dist=1.5):
+        self.iou_thresh = float(iou_thresh)
+        self.pad = float(pad)
+        self.max_misses = int(max_misses)
+        self.max_dist = float(max_dist)
+
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.vel = np.zeros((0, 4), dtype=np.float32)
+        self.misses = np.zeros((0,), dtype=np.int32)
+        self.fresh = np.zeros((0,), dtype=bool)  # no velocity measured yet
+        self.age = 0  # frames since the last keyframe
+
+    def update(self, xyxy):
+        """Feed keyframe detections; returns the boxes to blur on this frame."""
+        det = np.zeros((0, 4), dtype=np.float32) if xyxy is None else np.asarray(xyxy, dtype=np.float32)
+        gap = self.age + 1
+        pred = self.boxes + self.vel * gap
+
+        pairs = greedy_match(iou_matrix(pred, det), self.iou_thresh)
+        pairs += greedy_match(
+            center_distance_matrix(pred, det), self.max_dist,
+            used_r=[t for t, _ in pairs], used_c=[d for _, d in pairs],
+            higher_is_better=False
+        )
+        matched_t = {t for t, _ in pairs}
+        matched_d = {d for _, d in pairs}
+
+        boxes, vel, misses, fresh = [], [], [], []
+        for t, d in pairs:
+            v = (det[d] - self.boxes[t]) / gap
+            boxes.append(det[d])
+            vel.append(v if self.fresh[t] else 0.5 * self.vel[t] + 0.5 * v)
+            misses.append(0)
+            fresh.append(False)
+        for d in range(len(det)):
+            if d not in matched_d:
+                boxes.append(det[d])
+                vel.append(np.zeros(4, dtype=np.float32))
+                misses.append(0)
+                fresh.append(True)
+
+        coasted = []
+        for t in range(len(self.boxes)):
+            if t in matched_t or self.misses[t] >= self.max_misses:
+                continue
+            boxes.append(pred[t])
+            vel.append(self.vel[t])
+            misses.append(self.misses[t] + 1)
+            fresh.append(self.fresh[t])
+            coasted.append(len(boxes) - 1)
+
+        self.boxes = np.array(boxes, dtype=np.float32).reshape(-1, 4)
+        self.vel = np.array(vel, dtype=np.float32).reshape(-1, 4)
+        self.misses = np.array(misses, dtype=np.int32)
+        self.fresh = np.array(fresh, dtype=bool)
+        self.age = 0
+
+        out = self.boxes.copy()
+        if coasted:
+            out[coasted] = self._padded(out[coasted], self.vel[coasted], self.fresh[coasted], gap)
+        return self._as_int(out)
+
+    def predict(self):
+        """Advance one frame without a detection; returns the padded boxes."""
+        self.age += 1
+        if len(self.boxes) == 0:
+            return None
+        moved = self.boxes + self.vel * self.age
+        return self._as_int(self._padded(moved, self.vel, self.fresh, self.age))
+
+    def _padded(self, boxes, vel, fresh, frames):
+        bw = boxes[:, 2] - boxes[:, 0]
+        bh = boxes[:, 3] - boxes[:, 1]
+        speed_x = np.where(fresh, self.pad * bw, np.abs(vel[:, [0, 2]]).max(axis=1))
+        speed_y = np.where(fresh, self.pad * bh, np.abs(vel[:, [1, 3]]).max(axis=1))
+        drift_x = speed_x * frames
+        drift_y = speed_y * frames
+        mx = self.pad * bw + drift_x
+        my = self.pad * bh + drift_y
+        out = boxes.copy()
+        out[:, 0] -= mx
+        out[:, 1] -= my
+        out[:, 2] += mx
+        out[:, 3] += my
+        return out
+
+    @staticmethod
+    def _as_int(boxes):
+        if len(boxes) == 0:
+            return None
+        out = np.empty_like(boxes, dtype=np.int64)
+        out[:, :2] = np.floor(boxes[:, :2])
+        out[:, 2:] = np.ceil(boxes[:, 2:])
+        return out
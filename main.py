@@ -1,9 +1,10 @@
 import os
-import time
 import threading
-import cv2
-import torch
-from ultralytics import YOLO
+import time
+import multiprocessing
+
+# Cold-start reference point; torch / ultralytics are not imported before the window is up
+T_START = time.perf_counter()
 
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
@@ -15,14 +16,21 @@ try:
 except Exception:
     DND_OK = False
 
+from faceshield import Engine, Settings
+from faceshield.anonymize import METHODS, SHAPES
+from faceshield.backends import BACKENDS, PRECISIONS
+from faceshield.encoders import CODECS, ENCODERS
+from faceshield.images import is_image_input
+from faceshield.preview import Preview
+from faceshield.progress import ProgressChannel, STAGES
+from faceshield.utils import fmt_time
 
-def fmt_time(seconds: float) -> str:
-    seconds = max(0, int(seconds))
-    m, s = divmod(seconds, 60)
-    h, m = divmod(m, 60)
-    if h > 0:
-        return f"{h:02d}:{m:02d}:{s:02d}"
-    return f"{m:02d}:{s:02d}"
+# Progress panel refresh interval (the worker never calls into Tk per frame)
+PROGRESS_POLL_MS = 125
+# Chunk length of resumable runs (seconds of video)
+CHECKPOINT_S = 60
+# Model preload waits this long after the last model / runtime edit (typing in the path)
+PRELOAD_DELAY_MS = 600
 
 
 class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
@@ -39,21 +47,52 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
         self.running = False
         self.stop_flag = False
 
+        # Loaded model is kept between runs (reloaded only when the .pt changes).
+        # It is preloaded in the background; the lock keeps preload and Run apart.
+        self.engine = None
+        self.engine_lock = threading.Lock()
+        self.preload_gen = 0
+        self.preload_job = None
+        self.startup_s = 0.0
+        self.stack_s = None
+        self.run_t0 = 0.0
+        # Worker publishes frame counts here; the UI polls it at PROGRESS_POLL_MS
+        self.metrics = ProgressChannel()
+
         # -----------------------------
         # UI variables
         # -----------------------------
         self.video_path = ctk.StringVar(value="")
         self.model_path = ctk.StringVar(value="yolov8l_100e.pt")
+        self.backend = ctk.StringVar(value="pytorch")
+        self.precision = ctk.StringVar(value="fp32")
         self.output_path = ctk.StringVar(value="faces_blurred.mp4")
+        self.encoder = ctk.StringVar(value="opencv")
+        self.codec = ctk.StringVar(value="libx264")
 
         self.conf = ctk.DoubleVar(value=0.20)
         self.iou = ctk.DoubleVar(value=0.45)
         self.imgsz = ctk.IntVar(value=1280)
         self.blur_strength = ctk.IntVar(value=75)
+        self.method = ctk.StringVar(value="gaussian")
+        self.shape = ctk.StringVar(value="rect")
 
         self.use_half = ctk.BooleanVar(value=True)
         self.preview = ctk.BooleanVar(value=True)
 
+        self.batch = ctk.IntVar(value=1)
+        self.interval = ctk.IntVar(value=1)
+        self.use_cache = ctk.BooleanVar(value=True)
+        self.workers = ctk.IntVar(value=1)
+        self.tiles = ctk.IntVar(value=0)
+        self.target_fps = ctk.IntVar(value=0)
+        self.motion = ctk.BooleanVar(value=False)
+        self.profile = ctk.BooleanVar(value=False)
+        self.resumable = ctk.BooleanVar(value=False)
+
+        for var in (self.model_path, self.backend, self.precision, self.imgsz):
+            var.trace_add("write", lambda *_: self.schedule_preload())
+
         # -----------------------------
         # Layout
         # -----------------------------
@@ -86,7 +125,8 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
         body.grid_rowconfigure(0, weight=1)
 
         # Left panel
-        left = ctk.CTkFrame(body, corner_radius=12)
+        # Scrollable: the Performance options below do not fit on small screens
+        left = ctk.CTkScrollableFrame(body, corner_radius=12)
         left.grid(row=0, column=0, padx=(12, 6), pady=12, sticky="nsew")
         left.grid_columnconfigure(0, weight=1)
 
@@ -105,7 +145,7 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
 
         self.drop_label = ctk.CTkLabel(
             drop,
-            text="Drop Video Here\n(or click 'Browse Video')",
+            text="Drop Video or Images Here\n(or click 'Browse Video' / 'Browse Images')",
             height=120,
             justify="center",
             font=ctk.CTkFont(size=16, weight="bold")
@@ -114,7 +154,7 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
 
         helper_drop = ctk.CTkLabel(
             drop,
-            text="Tip: Drag & drop a .mp4/.avi/.mkv file to auto-fill the input path.",
+            text="Tip: Drop a .mp4/.avi/.mkv file, an image folder, a photo or a .zip/.tar archive.",
             font=ctk.CTkFont(size=12),
             text_color="#A9A9A9"
         )
@@ -126,8 +166,17 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
         else:
             self.drop_label.configure(text="Drag & Drop needs tkinterdnd2\n(or click 'Browse Video')")
 
-        browse_btn = ctk.CTkButton(drop, text="Browse Video", command=self.browse_video)
-        browse_btn.grid(row=2, column=0, padx=12, pady=(0, 12), sticky="ew")
+        browse_row = ctk.CTkFrame(drop, fg_color="transparent")
+        browse_row.grid(row=2, column=0, padx=12, pady=(0, 12), sticky="ew")
+        browse_row.grid_columnconfigure(0, weight=1)
+        browse_row.grid_columnconfigure(1, weight=1)
+
+        ctk.CTkButton(browse_row, text="Browse Video", command=self.browse_video).grid(
+            row=0, column=0, padx=(0, 6), sticky="ew"
+        )
+        ctk.CTkButton(browse_row, text="Browse Images", command=self.browse_images).grid(
+            row=0, column=1, padx=(6, 0), sticky="ew"
+        )
 
         self.video_path_lbl = ctk.CTkLabel(left, textvariable=self.video_path, wraplength=420, anchor="w")
         self.video_path_lbl.grid(row=1, column=0, padx=12, pady=(0, 6), sticky="ew")
@@ -165,6 +214,40 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
         self.model_entry.grid(row=0, column=0, sticky="ew", padx=(0, 8))
         ctk.CTkButton(model_row, text="Browse", width=90, command=self.browse_model).grid(row=0, column=1)
 
+        ctk.CTkLabel(
+            model_box,
+            text="Runtime / precision. ONNX and OpenVINO export the .pt once per IMGSZ (CPU speed-up).",
+            font=ctk.CTkFont(size=12),
+            text_color="#A9A9A9"
+        ).grid(row=3, column=0, padx=12, pady=(0, 6), sticky="w")
+
+        backend_row = ctk.CTkFrame(model_box, fg_color="transparent")
+        backend_row.grid(row=4, column=0, padx=12, pady=(0, 10), sticky="ew")
+        backend_row.grid_columnconfigure(0, weight=1)
+        backend_row.grid_columnconfigure(1, weight=1)
+
+        self.backend_combo = ctk.CTkOptionMenu(
+            backend_row, values=list(BACKENDS), command=lambda v: self.backend.set(v)
+        )
+        self.backend_combo.set(self.backend.get())
+        self.backend_combo.grid(row=0, column=0, padx=(0, 6), sticky="ew")
+
+        self.precision_combo = ctk.CTkOptionMenu(
+            backend_row, values=list(PRECISIONS), command=lambda v: self.precision.set(v)
+        )
+        self.precision_combo.set(self.precision.get())
+        self.precision_combo.grid(row=0, column=1, padx=(6, 0), sticky="ew")
+
+        self.model_status_lbl = ctk.CTkLabel(
+            model_box,
+            text="Loading ML runtime in the background...",
+            font=ctk.CTkFont(size=12),
+            text_color="#A9A9A9",
+            wraplength=400,
+            justify="left"
+        )
+        self.model_status_lbl.grid(row=5, column=0, padx=12, pady=(0, 10), sticky="w")
+
         # -----------------------------
         # Output selection
         # -----------------------------
@@ -190,6 +273,145 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
         self.out_entry.grid(row=0, column=0, sticky="ew", padx=(0, 8))
         ctk.CTkButton(out_row, text="Save As", width=90, command=self.save_as).grid(row=0, column=1)
 
+        ctk.CTkLabel(
+            out_box,
+            text="Encoder / codec. ffmpeg encodes H.264/H.265 and keeps the original audio.",
+            font=ctk.CTkFont(size=12),
+            text_color="#A9A9A9"
+        ).grid(row=3, column=0, padx=12, pady=(0, 6), sticky="w")
+
+        enc_row = ctk.CTkFrame(out_box, fg_color="transparent")
+        enc_row.grid(row=4, column=0, padx=12, pady=(0, 10), sticky="ew")
+        enc_row.grid_columnconfigure(0, weight=1)
+        enc_row.grid_columnconfigure(1, weight=1)
+
+        self.encoder_combo = ctk.CTkOptionMenu(
+            enc_row, values=list(ENCODERS), command=lambda v: self.encoder.set(v)
+        )
+        self.encoder_combo.set(self.encoder.get())
+        self.encoder_combo.grid(row=0, column=0, padx=(0, 6), sticky="ew")
+
+        self.codec_combo = ctk.CTkOptionMenu(
+            enc_row, values=list(CODECS), command=lambda v: self.codec.set(v)
+        )
+        self.codec_combo.set(self.codec.get())
+        self.codec_combo.grid(row=0, column=1, padx=(6, 0), sticky="ew")
+
+        # -----------------------------
+        # Performance options
+        # -----------------------------
+        perf_box = ctk.CTkFrame(left, corner_radius=12)
+        perf_box.grid(row=5, column=0, padx=12, pady=6, sticky="ew")
+        perf_box.grid_columnconfigure(0, weight=1)
+
+        ctk.CTkLabel(perf_box, text="Performance", font=ctk.CTkFont(weight="bold")).grid(
+            row=0, column=0, padx=12, pady=(10, 2), sticky="w"
+        )
+
+        ctk.CTkLabel(perf_box, text="Batch size").grid(row=1, column=0, padx=12, pady=(4, 0), sticky="w")
+        ctk.CTkLabel(
+            perf_box,
+            text="Frames sent to the model at once. Higher uses more CPU cores.",
+            font=ctk.CTkFont(size=12),
+            text_color="#A9A9A9"
+        ).grid(row=2, column=0, padx=12, pady=(0, 6), sticky="w")
+
+        self.batch_combo = ctk.CTkOptionMenu(perf_box, values=["1", "4", "8", "16"], command=self.on_batch_change)
+        self.batch_combo.set(str(self.batch.get()))
+        self.batch_combo.grid(row=3, column=0, padx=12, pady=(0, 10), sticky="ew")
+
+        ctk.CTkLabel(perf_box, text="Detection interval").grid(row=4, column=0, padx=12, pady=(4, 0), sticky="w")
+        ctk.CTkLabel(
+            perf_box,
+            text="Detect every N frames and track faces in between. 1 = every frame.",
+            font=ctk.CTkFont(size=12),
+            text_color="#A9A9A9"
+        ).grid(row=5, column=0, padx=12, pady=(0, 6), sticky="w")
+
+        self.interval_combo = ctk.CTkOptionMenu(
+            perf_box, values=["1", "2", "3", "4", "5", "6", "8"], command=self.on_interval_change
+        )
+        self.interval_combo.set(str(self.interval.get()))
+        self.interval_combo.grid(row=6, column=0, padx=12, pady=(0, 10), sticky="ew")
+
+        self.cache_chk = ctk.CTkCheckBox(perf_box, text="Reuse detection cache", variable=self.use_cache)
+        self.cache_chk.grid(row=7, column=0, padx=12, pady=(2, 2), sticky="w")
+        ctk.CTkLabel(
+            perf_box,
+            text="Re-renders of the same video skip detection (sidecar .dets.npz file).",
+            font=ctk.CTkFont(size=12),
+            text_color="#A9A9A9"
+        ).grid(row=8, column=0, padx=12, pady=(0, 10), sticky="w")
+
+        ctk.CTkLabel(perf_box, text="Parallel segments").grid(row=9, column=0, padx=12, pady=(4, 0), sticky="w")
+        ctk.CTkLabel(
+            perf_box,
+            text="Long videos: process N parts at once, one model per process.",
+            font=ctk.CTkFont(size=12),
+            text_color="#A9A9A9"
+        ).grid(row=10, column=0, padx=12, pady=(0, 6), sticky="w")
+
+        self.workers_combo = ctk.CTkOptionMenu(
+            perf_box, values=["1", "2", "4", "8"], command=self.on_workers_change
+        )
+        self.workers_combo.set(str(self.workers.get()))
+        self.workers_combo.grid(row=11, column=0, padx=12, pady=(0, 10), sticky="ew")
+
+        ctk.CTkLabel(perf_box, text="Tiled detection").grid(row=12, column=0, padx=12, pady=(4, 0), sticky="w")
+        ctk.CTkLabel(
+            perf_box,
+            text="Small/distant faces: detect on N overlapping tiles at IMGSZ (try 640) + a 640 overview.",
+            font=ctk.CTkFont(size=12),
+            text_color="#A9A9A9"
+        ).grid(row=13, column=0, padx=12, pady=(0, 6), sticky="w")
+
+        self.tiles_combo = ctk.CTkOptionMenu(
+            perf_box, values=["off", "2", "3", "4"], command=self.on_tiles_change
+        )
+        self.tiles_combo.set("off")
+        self.tiles_combo.grid(row=14, column=0, padx=12, pady=(0, 10), sticky="ew")
+
+        self.motion_chk = ctk.CTkCheckBox(perf_box, text="Motion gate (fixed cameras)", variable=self.motion)
+        self.motion_chk.grid(row=15, column=0, padx=12, pady=(2, 2), sticky="w")
+        ctk.CTkLabel(
+            perf_box,
+            text="Reuses boxes on static frames and only detects regions that moved.",
+            font=ctk.CTkFont(size=12),
+            text_color="#A9A9A9"
+        ).grid(row=16, column=0, padx=12, pady=(0, 10), sticky="w")
+
+        self.profile_chk = ctk.CTkCheckBox(perf_box, text="Profile run", variable=self.profile)
+        self.profile_chk.grid(row=17, column=0, padx=12, pady=(2, 2), sticky="w")
+        ctk.CTkLabel(
+            perf_box,
+            text="Times every stage; writes <output>.profile.txt and a Chrome trace (.json).",
+            font=ctk.CTkFont(size=12),
+            text_color="#A9A9A9"
+        ).grid(row=18, column=0, padx=12, pady=(0, 10), sticky="w")
+
+        ctk.CTkLabel(perf_box, text="Adaptive speed (target FPS)").grid(row=19, column=0, padx=12, pady=(4, 0), sticky="w")
+        ctk.CTkLabel(
+            perf_box,
+            text="Lowers IMGSZ / detection rate on easy scenes; small faces keep full detail.",
+            font=ctk.CTkFont(size=12),
+            text_color="#A9A9A9"
+        ).grid(row=20, column=0, padx=12, pady=(0, 6), sticky="w")
+
+        self.target_fps_combo = ctk.CTkOptionMenu(
+            perf_box, values=["off", "10", "15", "25", "30"], command=self.on_target_fps_change
+        )
+        self.target_fps_combo.set("off")
+        self.target_fps_combo.grid(row=21, column=0, padx=12, pady=(0, 10), sticky="ew")
+
+        self.resumable_chk = ctk.CTkCheckBox(perf_box, text="Resumable (checkpoints)", variable=self.resumable)
+        self.resumable_chk.grid(row=22, column=0, padx=12, pady=(2, 2), sticky="w")
+        ctk.CTkLabel(
+            perf_box,
+            text=f"Saves finished {CHECKPOINT_S}s chunks; after a Stop or crash, Run again to continue.",
+            font=ctk.CTkFont(size=12),
+            text_color="#A9A9A9"
+        ).grid(row=23, column=0, padx=12, pady=(0, 10), sticky="w")
+
         # -----------------------------
         # Controls (right panel)
         # -----------------------------
@@ -240,7 +462,7 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
         )
         ctk.CTkLabel(
             controls,
-            text="Gaussian blur kernel size (odd). Bigger = more blur.",
+            text="Blur kernel size (odd). Bigger = more blur. Method / face shape below.",
             font=ctk.CTkFont(size=12),
             text_color="#A9A9A9"
         ).grid(row=7, column=0, padx=12, pady=(0, 6), sticky="w")
@@ -252,26 +474,43 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
         self.blur_value_lbl = ctk.CTkLabel(controls, text=f"{self.blur_strength.get()}")
         self.blur_value_lbl.grid(row=9, column=0, padx=12, pady=(0, 10), sticky="w")
 
+        method_row = ctk.CTkFrame(controls, fg_color="transparent")
+        method_row.grid(row=10, column=0, padx=12, pady=(0, 10), sticky="ew")
+        method_row.grid_columnconfigure(0, weight=1)
+        method_row.grid_columnconfigure(1, weight=1)
+
+        self.method_combo = ctk.CTkOptionMenu(
+            method_row, values=list(METHODS), command=lambda v: self.method.set(v)
+        )
+        self.method_combo.set(self.method.get())
+        self.method_combo.grid(row=0, column=0, padx=(0, 6), sticky="ew")
+
+        self.shape_combo = ctk.CTkOptionMenu(
+            method_row, values=list(SHAPES), command=lambda v: self.shape.set(v)
+        )
+        self.shape_combo.set(self.shape.get())
+        self.shape_combo.grid(row=0, column=1, padx=(6, 0), sticky="ew")
+
         self.half_chk = ctk.CTkCheckBox(controls, text="Half precision (GPU speed-up)", variable=self.use_half)
-        self.half_chk.grid(row=10, column=0, padx=12, pady=(6, 2), sticky="w")
+        self.half_chk.grid(row=11, column=0, padx=12, pady=(6, 2), sticky="w")
         ctk.CTkLabel(
             controls,
             text="Enable only if CUDA GPU is available. Improves speed.",
             font=ctk.CTkFont(size=12),
             text_color="#A9A9A9"
-        ).grid(row=11, column=0, padx=12, pady=(0, 8), sticky="w")
+        ).grid(row=12, column=0, padx=12, pady=(0, 8), sticky="w")
 
         self.preview_chk = ctk.CTkCheckBox(controls, text="Show preview window", variable=self.preview)
-        self.preview_chk.grid(row=12, column=0, padx=12, pady=(2, 2), sticky="w")
+        self.preview_chk.grid(row=13, column=0, padx=12, pady=(2, 2), sticky="w")
         ctk.CTkLabel(
             controls,
             text="Shows live output. Press 'q' to stop from the preview window.",
             font=ctk.CTkFont(size=12),
             text_color="#A9A9A9"
-        ).grid(row=13, column=0, padx=12, pady=(0, 10), sticky="w")
+        ).grid(row=14, column=0, padx=12, pady=(0, 10), sticky="w")
 
         btn_row = ctk.CTkFrame(controls, fg_color="transparent")
-        btn_row.grid(row=14, column=0, padx=12, pady=(6, 12), sticky="ew")
+        btn_row.grid(row=15, column=0, padx=12, pady=(6, 12), sticky="ew")
         btn_row.grid_columnconfigure(0, weight=1)
         btn_row.grid_columnconfigure(1, weight=1)
 
@@ -307,7 +546,18 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
         self.progress_bar.grid(row=2, column=0, padx=12, pady=(0, 6), sticky="ew")
 
         self.progress_lbl = ctk.CTkLabel(prog, text="0%  |  ETA: --:--")
-        self.progress_lbl.grid(row=3, column=0, padx=12, pady=(0, 12), sticky="w")
+        self.progress_lbl.grid(row=3, column=0, padx=12, pady=(0, 2), sticky="w")
+
+        self.stage_lbl = ctk.CTkLabel(
+            prog,
+            text=self._stage_text({}),
+            font=ctk.CTkFont(size=12),
+            text_color="#A9A9A9"
+        )
+        self.stage_lbl.grid(row=4, column=0, padx=12, pady=(0, 12), sticky="w")
+
+        # Heavy imports and the model load start once the window is on screen
+        self.after(0, self.on_started)
 
     def _slider_row(self, parent, label, helper, var, from_, to, row):
         wrap = ctk.CTkFrame(parent, fg_color="transparent")
@@ -358,11 +608,20 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
     def browse_video(self):
         fp = filedialog.askopenfilename(
             title="Select video",
-            filetypes=[("Video files", "*.mp4 *.avi *.mkv *.mov"), ("All files", "*.*")]
+            filetypes=[
+                ("Video files", "*.mp4 *.avi *.mkv *.mov"),
+                ("Images / archives", "*.jpg *.jpeg *.png *.webp *.bmp *.tif *.tiff *.zip *.tar *.tgz *.tar.gz"),
+                ("All files", "*.*"),
+            ]
         )
         if fp:
             self.video_path.set(fp)
 
+    def browse_images(self):
+        folder = filedialog.askdirectory(title="Select image folder")
+        if folder:
+            self.video_path.set(folder)
+
     def browse_model(self):
         fp = filedialog.askopenfilename(
             title="Select model (.pt)",
@@ -375,7 +634,7 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
         fp = filedialog.asksaveasfilename(
             title="Save output as",
             defaultextension=".mp4",
-            filetypes=[("MP4 video", "*.mp4"), ("AVI video", "*.avi")]
+            filetypes=[("MP4 video", "*.mp4"), ("AVI video", "*.avi"), ("MKV video", "*.mkv")]
         )
         if fp:
             self.output_path.set(fp)
@@ -386,6 +645,30 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
         except Exception:
             pass
 
+    def on_batch_change(self, v):
+        try:
+            self.batch.set(int(v))
+        except Exception:
+            pass
+
+    def on_interval_change(self, v):
+        try:
+            self.interval.set(int(v))
+        except Exception:
+            pass
+
+    def on_workers_change(self, v):
+        try:
+            self.workers.set(int(v))
+        except Exception:
+            pass
+
+    def on_tiles_change(self, v):
+        self.tiles.set(0 if v == "off" else int(v))
+
+    def on_target_fps_change(self, v):
+        self.target_fps.set(0 if v == "off" else int(v))
+
     def on_blur_change(self, v):
         val = int(round(float(v)))
         if val % 2 == 0:
@@ -393,6 +676,99 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
         self.blur_strength.set(val)
         self.blur_value_lbl.configure(text=str(val))
 
+    # -----------------------------
+    # Start-up / model preload
+    # -----------------------------
+    def on_started(self):
+        self.update_idletasks()
+        self.startup_s = time.perf_counter() - T_START
+        threading.Thread(target=self.load_stack, daemon=True).start()
+
+    def load_stack(self):
+        # Importing ultralytics pulls in torch: the slow part of a cold start
+        t = time.perf_counter()
+        try:
+            import ultralytics  # noqa: F401
+        except Exception as e:
+            text = f"ML runtime failed to load: {e}"
+            self.after(0, lambda: self.set_model_status(text))
+            return
+        self.stack_s = time.perf_counter() - t
+        self.after(0, lambda: self.schedule_preload(0))
+
+    def schedule_preload(self, delay_ms=PRELOAD_DELAY_MS):
+        if self.stack_s is None:
+            return  # load_stack preloads once the runtime is in
+        if self.preload_job is not None:
+            self.after_cancel(self.preload_job)
+        self.preload_job = self.after(delay_ms, self.start_preload)
+
+    def start_preload(self):
+        self.preload_job = None
+        if self.running:
+            return
+        try:
+            settings = self.current_settings()
+        except Exception:
+            return
+        if not os.path.isfile(settings.model):
+            self.set_model_status(f"{self._startup_text()}  Select a model to preload it.")
+            return
+        self.preload_gen += 1
+        self.set_model_status(f"{self._startup_text()}  Loading {os.path.basename(settings.model)}...")
+        threading.Thread(target=self.preload, args=(settings, self.preload_gen), daemon=True).start()
+
+    def preload(self, settings, gen):
+        """Load and warm up the engine for ``settings`` so Run starts on a ready model."""
+        with self.engine_lock:
+            if gen != self.preload_gen:
+                return  # superseded by a newer edit or a Run
+            engine = self.engine
+            try:
+                if engine is None or not engine.matches(settings):
+                    engine = Engine(settings)
+                    engine.warmup()
+                    self.engine = engine
+                text = (
+                    f"{self._startup_text()}  Model ready: load {engine.load_s:.1f}s, "
+                    f"warm-up {engine.warmup_s:.1f}s."
+                )
+            except Exception as e:
+                text = f"Model not loaded: {e}"
+        self.after(0, lambda: self.set_model_status(text))
+
+    def _startup_text(self):
+        return f"Window in {self.startup_s:.1f}s, ML runtime in {self.stack_s or 0.0:.1f}s."
+
+    def set_model_status(self, text):
+        self.model_status_lbl.configure(text=text)
+
+    def current_settings(self) -> Settings:
+        return Settings(
+            model=self.model_path.get().strip(),
+            conf=float(self.conf.get()),
+            iou=float(self.iou.get()),
+            imgsz=int(self.imgsz.get()),
+            blur=int(self.blur_strength.get()),
+            half=bool(self.use_half.get()),
+            backend=self.backend.get(),
+            precision=self.precision.get(),
+            method=self.method.get(),
+            shape=self.shape.get(),
+            batch=int(self.batch.get()),
+            tiles=int(self.tiles.get()),
+            coarse_imgsz=640 if int(self.tiles.get()) > 1 else 0,
+            interval=int(self.interval.get()),
+            motion=bool(self.motion.get()),
+            profile=bool(self.profile.get()),
+            target_fps=float(self.target_fps.get()),
+            checkpoint_s=CHECKPOINT_S if self.resumable.get() else 0.0,
+            cache=bool(self.use_cache.get()),
+            workers=int(self.workers.get()),
+            encoder=self.encoder.get(),
+            codec=self.codec.get(),
+        )
+
     # -----------------------------
     # Run / Stop
     # -----------------------------
@@ -405,7 +781,7 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
         out = self.output_path.get().strip()
 
         if not vid or not os.path.exists(vid):
-            messagebox.showerror("Error", "Please select a valid video file.")
+            messagebox.showerror("Error", "Please select a valid video file, image folder or archive.")
             return
         if not mdl or not os.path.exists(mdl):
             messagebox.showerror("Error", "Please select a valid model (.pt) file.")
@@ -416,12 +792,16 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
 
         self.running = True
         self.stop_flag = False
+        self.run_t0 = time.perf_counter()
         self.run_btn.configure(state="disabled")
         self.stop_btn.configure(state="normal")
         self.progress_bar.set(0.0)
         self.progress_lbl.configure(text="0%  |  ETA: --:--")
+        self.stage_lbl.configure(text=self._stage_text({}))
+        self.metrics.start(0)
 
         threading.Thread(target=self.worker, daemon=True).start()
+        self.after(PROGRESS_POLL_MS, self.poll_progress)
 
     def on_stop(self):
         if self.running:
@@ -434,117 +814,63 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
     def worker(self):
         try:
             vid = self.video_path.get().strip()
-            mdl = self.model_path.get().strip()
             out = self.output_path.get().strip()
-
-            conf = float(self.conf.get())
-            iou = float(self.iou.get())
-            imgsz = int(self.imgsz.get())
-            blur_strength = int(self.blur_strength.get())
             show_preview = bool(self.preview.get())
 
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            half = bool(self.use_half.get()) and (device == "cuda")
-
-            model = YOLO(mdl).to(device)
-
-            # Read video metadata for progress calculation
-            cap = cv2.VideoCapture(vid)
-            if not cap.isOpened():
-                raise RuntimeError("Could not open input video.")
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            cap.release()
+            settings = self.current_settings()
 
-            if fps <= 0:
-                fps = 25
+            # Waits for a preload in progress instead of loading the model a second time
+            with self.engine_lock:
+                self.preload_gen += 1
+                if self.engine is None or not self.engine.matches(settings):
+                    self.engine = Engine(settings)
+                else:
+                    self.engine.settings = settings
+            wait_s = time.perf_counter() - self.run_t0
 
-            # Open output writer
-            ext = os.path.splitext(out)[1].lower()
-            if ext == ".avi":
-                fourcc = cv2.VideoWriter_fourcc(*"XVID")
-            else:
-                fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-
-            writer = cv2.VideoWriter(out, fourcc, fps, (w, h))
-            if not writer.isOpened():
-                raise RuntimeError("Could not open output writer. Try another path or .avi output.")
-
-            # Blur kernel must be odd
-            k = blur_strength if blur_strength % 2 == 1 else blur_strength + 1
-            ksize = (k, k)
-
-            processed = 0
-            t0 = time.time()
-
-            # Stream inference from Ultralytics
-            for res in model.predict(
-                source=vid,
-                stream=True,
-                conf=conf,
-                iou=iou,
-                imgsz=imgsz,
-                device=0 if device == "cuda" else "cpu",
-                half=half,
-                verbose=False
-            ):
+            if is_image_input(vid):
+                # Image mode: folders / photos / archives, written next to the input (*_blurred)
+                self.engine.process_images([vid], metrics=self.metrics, should_stop=lambda: self.stop_flag)
+                report = self.engine.last_report
                 if self.stop_flag:
-                    break
-
-                frame = res.orig_img
-                boxes = res.boxes
-
-                if boxes is not None and boxes.xyxy is not None and len(boxes) > 0:
-                    xyxy = boxes.xyxy
-                    if hasattr(xyxy, "cpu"):
-                        xyxy = xyxy.cpu()
-                    xyxy = xyxy.numpy().astype(int)
-
-                    for (x1, y1, x2, y2) in xyxy:
-                        x1 = max(0, min(x1, w - 1))
-                        x2 = max(0, min(x2, w - 1))
-                        y1 = max(0, min(y1, h - 1))
-                        y2 = max(0, min(y2, h - 1))
-                        if x2 <= x1 or y2 <= y1:
-                            continue
-
-                        roi = frame[y1:y2, x1:x2]
-                        if roi.size == 0:
-                            continue
-                        frame[y1:y2, x1:x2] = cv2.GaussianBlur(roi, ksize, 0)
-
-                writer.write(frame)
-                processed += 1
-
-                # Update progress and ETA
-                elapsed = time.time() - t0
-                fps_proc = processed / elapsed if elapsed > 0 else 0.0
-
-                if total_frames > 0:
-                    p = processed / total_frames
-                    remaining = (total_frames - processed) / fps_proc if fps_proc > 0 else -1
+                    msg = f"Processing stopped by user.\n\n{report}\n\nRun again to continue with the rest."
+                    self.after(0, lambda: messagebox.showinfo("Stopped", msg))
                 else:
-                    p = 0.0
-                    remaining = -1
-
-                self.after(0, self.update_progress, p, remaining)
-
-                # Optional live preview
-                if show_preview:
-                    cv2.imshow("Faces Blurred (Preview)", frame)
-                    if cv2.waitKey(1) & 0xFF == ord("q"):
-                        self.stop_flag = True
-                        break
-
-            writer.release()
-            cv2.destroyAllWindows()
+                    msg = f"Saved next to the input (names ending in _blurred).\n\n{report}"
+                    self.after(0, lambda: messagebox.showinfo("Done", msg))
+                return
+
+            def quit_preview():
+                self.stop_flag = True
+
+            # Optional live preview: its own thread, latest frame only, rate limited
+            preview = Preview("Faces Blurred (Preview)", on_quit=quit_preview).start() if show_preview else None
+
+            try:
+                self.engine.process_video(
+                    vid, out,
+                    on_frame=preview.offer if preview else None,
+                    metrics=self.metrics,
+                    should_stop=lambda: self.stop_flag
+                )
+            finally:
+                if preview:
+                    preview.close()
 
             if self.stop_flag:
-                self.after(0, lambda: messagebox.showinfo("Stopped", "Processing stopped by user."))
+                msg = "Processing stopped by user."
+                if settings.checkpoint_s > 0:
+                    msg += "\n\nFinished chunks are kept. Run again with the same settings to resume."
+                self.after(0, lambda: messagebox.showinfo("Stopped", msg))
             else:
-                self.after(0, lambda: messagebox.showinfo("Done", f"Saved:\n{out}"))
+                notes = [self.engine.last_report] if self.engine.last_report else []
+                if self.engine.first_frame_s is not None:
+                    notes.append(
+                        f"Run to first frame: {wait_s + self.engine.first_frame_s:.2f}s "
+                        f"(waited {wait_s:.2f}s for the model)"
+                    )
+                report = "\n\n" + "\n".join(notes) if notes else ""
+                self.after(0, lambda: messagebox.showinfo("Done", f"Saved:\n{out}{report}"))
 
         except Exception as e:
             self.after(0, lambda: messagebox.showerror("Error", str(e)))
@@ -554,6 +880,18 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
             self.stop_flag = False
             self.after(0, self.reset_buttons)
 
+    def poll_progress(self):
+        snap = self.metrics.poll()
+        if snap.total > 0:
+            self.update_progress(snap.p, snap.remaining)
+        self.stage_lbl.configure(text=self._stage_text(snap.stage_fps))
+        if self.running:
+            self.after(PROGRESS_POLL_MS, self.poll_progress)
+
+    @staticmethod
+    def _stage_text(stage_fps):
+        return "   ".join(f"{s}: {stage_fps.get(s, 0.0):.1f} fps" for s in STAGES)
+
     def update_progress(self, p: float, remaining: float):
         p = max(0.0, min(1.0, float(p)))
         self.progress_bar.set(p)
@@ -564,8 +902,12 @@ class App(ctk.CTk if not DND_OK else TkinterDnD.Tk):
     def reset_buttons(self):
         self.run_btn.configure(state="normal")
         self.stop_btn.configure(state="disabled")
+        # Settings edited during the run were not preloaded
+        self.schedule_preload(0)
 
 
 if __name__ == "__main__":
+    # Segment workers are spawned processes; needed for the frozen executable
+    multiprocessing.freeze_support()
     app = App()
     app.mainloop()
\ No newline at end of file
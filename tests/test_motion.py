@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from faceshield.motion import MotionGate, detect_gated
+
+
+W, H = 1280, 720
+BATCH = 8
+
+
+def background():
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:H, 0:W]
+    img = np.stack([(x * 0.15) % 256, (y * 0.3) % 256, ((x + y) * 0.1) % 256], axis=2).astype(np.uint8)
+    for _ in range(40):
+        cx, cy, r = rng.integers(0, W), rng.integers(0, H), rng.integers(10, 60)
+        img[max(0, cy - r):cy + r, max(0, cx - r):cx + r] = rng.integers(0, 256, 3)
+    return img
+
+
+def find_red(img):
+    """Stand-in detector: the bounding box of the pure red pixels."""
+    ys, xs = np.nonzero((img[..., 2] > 200) & (img[..., 1] < 40) & (img[..., 0] < 40))
+    if len(xs) == 0:
+        return None, None
+    return np.array([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]], dtype=np.float32), np.ones(1)
+
+
+def run_gated(gate, frames):
+    boxes = []
+    for k in range(0, len(frames), BATCH):
+        boxes += detect_gated(
+            gate, frames[k:k + BATCH],
+            lambda fs: [find_red(f) for f in fs],
+            lambda crops, imgsz: [find_red(c) for c in crops],
+            640,
+        )
+    return boxes
+
+
+@pytest.mark.parametrize("fw, fh, speed", [(50, 60, 2), (50, 60, 4), (120, 150, 2), (50, 60, 1)])
+def test_moving_face_stays_blurred(fw, fh, speed):
+    bg = background()
+    gate = MotionGate(W, H)
+    frames, faces = [], []
+    for i in range(240):
+        x = 100 + speed * i
+        y = 300 + (speed * i) // 3
+        f = bg.copy()
+        f[y:y + fh, x:x + fw] = (0, 0, 255)
+        frames.append(f)
+        faces.append((x, y, x + fw, y + fh))
+
+    boxes = run_gated(gate, frames)
+    for i, ((x1, y1, x2, y2), b) in enumerate(zip(faces, boxes)):
+        assert b is not None, f"frame {i}: no box"
+        inside = (b[:, 0] <= x1) & (b[:, 1] <= y1) & (b[:, 2] >= x2) & (b[:, 3] >= y2)
+        assert inside.any(), f"frame {i}: face {(x1, y1, x2, y2)} outside {b.tolist()}"
+    # The gate still saves work on a scene that is mostly still
+    assert gate.stats["full"] < len(frames) / 2
+
+
+@pytest.mark.parametrize("size, at", [(16, 13), (24, 3), (40, 9)])
+def test_small_face_appearing_mid_batch(size, at):
+    bg = background()
+    gate = MotionGate(W, H)
+    frames = []
+    for i in range(40):
+        f = bg.copy()
+        if i >= at:
+            f[500:500 + size, 900:900 + size] = (0, 0, 255)
+        frames.append(f)
+
+    for i, b in enumerate(run_gated(gate, frames)):
+        if i < at:
+            continue
+        assert b is not None, f"frame {i}: new face not blurred"
+        inside = (b[:, 0] <= 900) & (b[:, 1] <= 500) & (b[:, 2] >= 900 + size) & (b[:, 3] >= 500 + size)
+        assert inside.any(), f"frame {i}: new face outside {b.tolist()}"